@@ -1,13 +1,31 @@
+import argparse
 import requests
 import json
+import threading
 import time
 from collections import defaultdict
 
+from concurrent.futures import ThreadPoolExecutor
+
+from adaptive_concurrency import AIMDController
+from corpus_store import load_cocktails
+from failure_queue import FAILURE_QUEUE_FILE, FailureQueue, classify_exception, classify_status
+from fuzzy_matcher import FuzzyIndex
+from ingredient_rules import INGREDIENT_RULES_FILE, load_rules
+from progress import ProgressReporter
+from recipe_inference import InferenceTables, infer_for_dataset
+
 # --- Configuration ---
 BASE_URL = 'http://192.168.000.000' # !!! VERIFY THIS IP ADDRESS IS CORRECT FOR YOUR COCKTAILPI SERVER !!!
 USERNAME = 'Admin'
 PASSWORD = '123456'
-COCKTAILS_DATA_FILE = 'cocktails_with_details_gemini.json'
+COCKTAILS_DATA_FILE = 'cocktails_with_details_gemini.json' # Or a compact store such as 'cocktails.db' (see corpus_store.py)
+REFERENCE_SNAPSHOT_FILE = 'cocktailpi_reference_snapshot.json' # Local copy of ingredient/glass/category IDs
+REFERENCE_SNAPSHOT_VERSION = 1
+FUZZY_MATCH_THRESHOLD = 85 # 0-100 similarity score an approximate ingredient match must reach
+RECIPE_POST_TIMEOUT = 30 # Seconds before a recipe POST counts as timed out (an overload signal)
+MAX_IMPORT_CONCURRENCY = 8 # Upper bound for parallel recipe POSTs; the actual level adapts to the server's latency
+IMPORT_RUN_SUMMARY_FILE = 'import_run_summary.json' # Machine-readable record of the last run (rates, error counts)
 
 # --- API Endpoints ---
 LOGIN_URL = f"{BASE_URL}/api/auth/login"
@@ -18,125 +36,35 @@ RECIPE_API_URL = f"{BASE_URL}/api/recipe/"
 CREATE_INGREDIENT_URL = f"{BASE_URL}/api/ingredient/" # Endpoint to create new ingredients
 
 # --- Global Session and Token ---
-session = requests.Session()
+# The HTTP session is created on first use, so importing this module (for the matching and payload
+# functions) doesn't set anything up.
+_session = None
+_session_lock = threading.Lock()
 access_token = None
 token_type = 'Bearer'
 
-# --- Ingredient Classification and Mapping Rules ---
-# This is a key part of smart mapping.
-# The keys are keywords found in scraped ingredient names.
-# The values are the target names of CocktailPi ingredient *groups* or *specific ingredients*
-# you want to map to. Order matters for specific vs. general (e.g., 'creme de cacao' before 'liqueur').
-# IMPORTANT: Ensure these values (the right side of the colon) exist as exact lowercase names
-# in your CocktailPi's ingredient list (either as groups or individual ingredients).
-INGREDIENT_CLASSIFICATION_RULES = {
-    # Spirits
-    'vodka': 'vodka',
-    'gin': 'gin',
-    'rum': 'rum', # General rum group
-    'white rum': 'white rum',
-    'gold rum': 'gold rum',
-    'aged rum': 'aged rum',
-    'tequila': 'tequila',
-    'mezcal': 'mezcal',
-    'whiskey': 'whiskey', # General whiskey group
-    'bourbon': 'bourbon',
-    'rye': 'rye whiskey',
-    'scotch': 'scotch',
-    'brandy': 'brandy', # General brandy group
-    'cognac': 'cognac',
-    'pisco': 'pisco', # Specific spirit, if not under 'brandy' group
-    'dry gin': 'gin', # map specific gin types to general gin
-
-    # Liqueurs (more specific first)
-    'blue curaçao': 'blue curaçao', # If you have it specific
-    'creme de cacao': 'chocolate liqueur', # Maps to a specific liqueur or a 'sweet liqueurs' group
-    'creme de cassis': 'cassis liqueur',
-    'coffee liqueur': 'coffee liqueur',
-    'orange liqueur': 'orange liqueur', # For Triple Sec, Cointreau, Grand Marnier
-    'triple sec': 'orange liqueur',
-    'cointreau': 'orange liqueur',
-    'grand marnier': 'orange liqueur',
-    'amaretto': 'amaretto',
-    'peach schnapps': 'peach schnapps',
-    'elderflower liqueur': 'elderflower liqueur',
-    'absinthe': 'absinthe',
-    'liqueur': 'liqueur', # General fallback for any other liqueur
-    'aperol': 'aperol',
-    'campari': 'campari',
-    'schnapps': 'schnapps', # General schnapps (e.g., Apple schnapps)
-
-    # Vermouths & Amari
-    'sweet vermouth': 'sweet vermouth',
-    'dry vermouth': 'dry vermouth',
-    'blanc vermouth': 'blanc vermouth',
-    'vermouth': 'vermouth', # General fallback for any vermouth
-    'amaro': 'amaro', # General amaro group
-    'fernet': 'fernet',
-    'lillet': 'lillet',
-
-    # Juices
-    'lemon juice': 'lemon juice',
-    'lime juice': 'lime juice',
-    'orange juice': 'orange juice',
-    'cranberry juice': 'cranberry juice',
-    'pineapple juice': 'pineapple juice',
-    'grapefruit juice': 'grapefruit juice',
-    'passion fruit juice': 'passion fruit juice',
-    'apple juice': 'apple juice',
-    'juice': 'juice', # General fallback for any other juice
-
-    # Syrups
-    'simple syrup': 'simple syrup',
-    'sugar syrup': 'simple syrup',
-    'orgeat': 'orgeat syrup',
-    'grenadine': 'grenadine',
-    'honey syrup': 'honey syrup',
-    'agave nectar': 'agave nectar',
-    'syrup': 'syrup', # General fallback for any other syrup
-    'honey': 'honey syrup', # Map raw honey to honey syrup if dispensable
-
-    # Bitters
-    'bitters': 'bitters', # General bitters group
-    'angostura bitters': 'bitters',
-    'orange bitters': 'orange bitters',
-    'peychaud\'s bitters': 'peychauds bitters',
-
-    # Mixers (often carbonated or non-alcoholic liquids)
-    'soda water': 'soda water',
-    'club soda': 'soda water',
-    'tonic water': 'tonic water',
-    'cola': 'cola',
-    'sprite': 'lemon-lime soda',
-    'lemon-lime': 'lemon-lime soda',
-    'ginger ale': 'ginger ale',
-    'ginger beer': 'ginger beer',
-    'milk': 'milk',
-    'cream': 'cream',
-    'condensed milk': 'condensed milk',
-
-    # Wines (if dispensable/categorized)
-    'sherry': 'sherry',
-    'prosecco': 'prosecco',
-    'champagne': 'champagne',
-    'cava': 'cava',
-    'dry white wine': 'dry white wine',
-
-    # Add more rules as needed based on your scraped data and CocktailPi setup
-    # Make sure keys are lowercase and values are exact lowercase CocktailPi names.
-}
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = requests.Session()
+    return _session
 
-# --- Ingredients that are typically garnishes or manual additions, not auto-created ---
-# This list prevents the script from trying to create things like 'ice cubes' or 'mint leaves' as ingredients.
-COMMON_IMPLIED_ELEMENTS = [
-    'ice', 'cubes', 'garnish', 'sprig', 'slice', 'wedge', 'peel', 'leaf',
-    'cherry', 'olive', 'salt', 'sugar', 'nutmeg', 'cinnamon', 'to taste',
-    'fill', 'top with', 'splash of', 'none', 'rim', 'dashes', 'drops', 'twist',
-    'dash', 'drop', 'muddle', 'muddled', 'fresh', 'dry', 'whole', 'powder',
-    'water', 'hot water', 'coffee', 'tea', 'egg white', 'egg yolk', # These are often explicitly listed but are manual
-    'mint', 'lime', 'lemon', # If these appear alone, assume they are garnish/manual fruit
-    'orange', 'grapefruit', 'pineapple', 'cranberry', 'apple', 'passion fruit' # As whole fruits
-]
+# --- Ingredient Classification and Mapping Rules ---
+# This is a key part of smart mapping. The classification rules (keyword in scraped ingredient name ->
+# CocktailPi ingredient *group* or *specific ingredient*), the common implied elements (garnishes and
+# manual additions that are never auto-created) and their explicit priorities live in ingredient_rules.json.
+# They are compiled once into a fast matcher (see ingredient_rules.py); run `python ingredient_rules.py`
+# after editing the file to check for conflicting or shadowed rules.
+# IMPORTANT: Ensure the rule targets exist as exact lowercase names in your CocktailPi's ingredient list.
+_ingredient_rules = None
+
+def get_ingredient_rules():
+    global _ingredient_rules
+    if _ingredient_rules is None:
+        _ingredient_rules = load_rules(INGREDIENT_RULES_FILE)
+    return _ingredient_rules
 
 # --- Default values for auto-created ingredients ---
 # These will be created as manual ingredients (not on pump) by default
@@ -151,6 +79,9 @@ AUTO_CREATE_DEFAULTS = {
 # We will populate this during fetch_cocktailpi_data()
 DEFAULT_PARENT_GROUP_ID = None
 
+# Written when a recipe yields no steps at all; such payloads are not worth importing
+NO_INSTRUCTIONS_MESSAGE = "No specific instructions found for this recipe. Combine ingredients and serve."
+
 # --- Function to make authenticated GET requests ---
 def authenticated_get(endpoint, params=None):
     if not access_token:
@@ -163,7 +94,7 @@ def authenticated_get(endpoint, params=None):
         'Accept': 'application/json'
     }
     try:
-        response = session.get(url, headers=headers, params=params)
+        response = get_session().get(url, headers=headers, params=params)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.HTTPError as e:
@@ -207,7 +138,7 @@ def create_cocktailpi_ingredient(name, ingredient_type='manual', alcohol_content
         'Accept': 'application/json'
     }
     try:
-        response = session.post(CREATE_INGREDIENT_URL, json=ingredient_payload, headers=headers)
+        response = get_session().post(CREATE_INGREDIENT_URL, json=ingredient_payload, headers=headers)
         response.raise_for_status()
         new_ingredient = response.json()
         print(f"  Successfully created ingredient '{name}' with ID: {new_ingredient['id']}")
@@ -237,7 +168,7 @@ def login():
         'Accept': 'application/json'
     }
     try:
-        login_response = session.post(LOGIN_URL, json=login_payload, headers=login_headers)
+        login_response = get_session().post(LOGIN_URL, json=login_payload, headers=login_headers)
         login_response.raise_for_status()
         print("Successfully logged in!")
         login_json = login_response.json()
@@ -314,10 +245,151 @@ def fetch_cocktailpi_data():
 
     return ingredient_name_to_id, glass_name_to_id, category_name_to_id
 
+# --- Fetch existing recipe names so duplicates can be skipped ---
+def fetch_existing_recipe_names():
+    existing_recipes_data = authenticated_get('recipe/')
+
+    existing_recipe_names = set()
+    if existing_recipes_data and isinstance(existing_recipes_data, dict) and 'content' in existing_recipes_data:
+        for recipe_dict in existing_recipes_data['content']:
+            if isinstance(recipe_dict, dict) and 'name' in recipe_dict:
+                existing_recipe_names.add(recipe_dict['name'].lower().strip())
+        print(f"  Detected existing recipes as a dictionary with 'content' key.")
+    else:
+        print(f"  Warning: Unexpected structure for existing recipes data. Cannot check for duplicates effectively. Data type: {type(existing_recipes_data)}")
+        # If it's not the expected dictionary structure, existing_recipe_names will remain empty,
+        # which means all recipes will be attempted for import, potentially leading to duplicates.
+
+    return existing_recipe_names
+
+# --- Reference snapshot: a local copy of the CocktailPi lookup data ---
+# Lets payloads be built offline (bundle export, dry runs) with the same IDs the server would use.
+def save_reference_snapshot(path, ingredient_map, glass_map, category_map, existing_recipe_names=()):
+    snapshot = {
+        'version': REFERENCE_SNAPSHOT_VERSION,
+        'createdAt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'baseUrl': BASE_URL,
+        'defaultParentGroupId': DEFAULT_PARENT_GROUP_ID,
+        'ingredients': ingredient_map,
+        'glasses': glass_map,
+        'categories': category_map,
+        'existingRecipes': sorted(existing_recipe_names)
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, indent=4, ensure_ascii=False)
+    print(f"Reference snapshot saved to {path}")
+
+def load_reference_snapshot(path):
+    global DEFAULT_PARENT_GROUP_ID
+
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+
+    if snapshot.get('version') != REFERENCE_SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported reference snapshot version {snapshot.get('version')!r} in {path}")
+
+    DEFAULT_PARENT_GROUP_ID = snapshot.get('defaultParentGroupId')
+    print(f"Loaded reference snapshot from {path} (taken {snapshot.get('createdAt')} from {snapshot.get('baseUrl')}): "
+          f"{len(snapshot['ingredients'])} ingredients, {len(snapshot['glasses'])} glasses, {len(snapshot['categories'])} categories.")
+    return snapshot['ingredients'], snapshot['glasses'], snapshot['categories'], set(snapshot.get('existingRecipes', []))
+
+# --- Default glass/category selection (used when inference finds no better match) ---
+def choose_default_glass_id(glass_map):
+    if not glass_map:
+        return 1 # Fallback to 1 if no common glass names found
+    # Prioritize common cocktail glasses by name
+    return glass_map.get('cocktail glass',
+           glass_map.get('coupe',
+           glass_map.get('old fashioned glass',
+           glass_map.get('highball glass',
+           glass_map.get('shot glass', list(glass_map.values())[0])))))
+
+def choose_default_category_id(category_map):
+    if not category_map:
+        return 7 # Fallback to 7 (often 'Other' or 'Classic')
+    # Prioritize 'Classic' or 'Other'
+    return category_map.get('classic',
+           category_map.get('other', list(category_map.values())[0]))
+
+# --- Per-ingredient resolution, memoized across recipes ---
+# The same scraped names ('gin', 'lemon juice', ...) appear in hundreds of recipes, so the outcome of the
+# implied-element check and the mapping hierarchy is cached by normalized name. The cache belongs to one
+# ingredient mapping and is dropped whenever that mapping changes (e.g. after auto-creating an ingredient).
+_resolution_cache = {}
+_resolution_cache_owner = None # The mapping the cache was built against
+_resolution_cache_owner_size = 0
+_fuzzy_index = None # Built lazily over the owner mapping's names
+
+def invalidate_resolution_cache():
+    global _resolution_cache_owner, _fuzzy_index
+    _resolution_cache.clear()
+    _resolution_cache_owner = None
+    _fuzzy_index = None
+
+def resolve_ingredient(ing_name_lower, ingredient_mapping):
+    """
+    Resolves a normalized scraped ingredient name against ingredient_mapping.
+    Returns (kind, cocktailpi_id, cocktailpi_name, detail) where kind is one of:
+      'implied'  - garnish/manual element, never dispensed; detail is True for generic terms like 'ice'
+      'mapped'   - detail is 'direct', 'fuzzy' or the classification keyword that matched
+      'unmapped' - no match; the caller decides between auto-creation and a written instruction
+    """
+    global _resolution_cache_owner, _resolution_cache_owner_size, _fuzzy_index
+
+    # A different mapping, or one that grew/shrank behind our back, invalidates every cached outcome
+    if ingredient_mapping is not _resolution_cache_owner or len(ingredient_mapping) != _resolution_cache_owner_size:
+        _resolution_cache.clear()
+        _resolution_cache_owner = ingredient_mapping
+        _resolution_cache_owner_size = len(ingredient_mapping)
+        _fuzzy_index = None
+
+    cached = _resolution_cache.get(ing_name_lower)
+    if cached is not None:
+        return cached
+
+    resolution = _resolve_ingredient_uncached(ing_name_lower, ingredient_mapping)
+    _resolution_cache[ing_name_lower] = resolution
+    return resolution
+
+def _get_fuzzy_index(ingredient_mapping):
+    global _fuzzy_index
+    if _fuzzy_index is None:
+        _fuzzy_index = FuzzyIndex(ingredient_mapping.keys(), score_threshold=FUZZY_MATCH_THRESHOLD)
+    return _fuzzy_index
+
+def _resolve_ingredient_uncached(ing_name_lower, ingredient_mapping):
+    rules = get_ingredient_rules()
+    if rules.is_implied(ing_name_lower):
+        is_generic_instruction_term = ing_name_lower in rules.generic_instruction_terms
+        return ('implied', None, None, is_generic_instruction_term)
+
+    # --- Mapping Logic Hierarchy ---
+
+    # 1. Check for a direct match in CocktailPi's current ingredients (exact name)
+    if ingredient_mapping.get(ing_name_lower):
+        return ('mapped', ingredient_mapping[ing_name_lower], ing_name_lower, 'direct')
+
+    # 2. Apply the classification rules (Smart Group/Specific Mapping), best-priority match first
+    # This attempts to map to a broader category/group in CocktailPi
+    for keyword, target_cp_name in rules.classify(ing_name_lower):
+        if ingredient_mapping.get(target_cp_name):
+            # Found a classification match, no need to check other rules for this ingredient
+            return ('mapped', ingredient_mapping[target_cp_name], target_cp_name, keyword)
+
+    # 3. Fallback to fuzzy matching (best-scoring approximate match above FUZZY_MATCH_THRESHOLD)
+    cp_name, _score = _get_fuzzy_index(ingredient_mapping).best_match(ing_name_lower)
+    if cp_name is not None and ingredient_mapping.get(cp_name):
+        return ('mapped', ingredient_mapping[cp_name], cp_name, 'fuzzy')
+
+    return ('unmapped', None, None, None)
+
 # --- Function to build the recipe payload for CocktailPi ---
-def build_cocktailpi_recipe_payload(scraped_recipe, ingredient_mapping, default_glass_id, default_category_id):
+# Pass create_ingredient=None to build payloads without touching the server (unmapped liquids become written instructions).
+def build_cocktailpi_recipe_payload(scraped_recipe, ingredient_mapping, glass_id, category_id,
+                                    create_ingredient=create_cocktailpi_ingredient):
     recipe_name = scraped_recipe.get('name')
     description = scraped_recipe.get('description', '')
+    implied_elements = get_ingredient_rules().implied_elements
     
     production_steps = []
     dispensable_ingredients = []
@@ -331,24 +403,27 @@ def build_cocktailpi_recipe_payload(scraped_recipe, ingredient_mapping, default_
         cocktailpi_ingredient_id = None
         mapped_cocktailpi_name = None # Store the name we mapped to
 
+        # --- Resolve the name once per unique ingredient (see resolve_ingredient) ---
+        resolution_kind, resolved_id, resolved_name, resolution_detail = resolve_ingredient(ing_name_lower, ingredient_mapping)
+
         # --- Check if it's a common implied element (garnish, non-liquid, etc.) ---
         # This prevents auto-creation of things like 'ice cubes' or 'mint leaves' as ingredients.
         # It also prevents adding explicit instructions for common terms.
-        if any(elem == ing_name_lower or (elem in ing_name_lower and len(ing_name_lower) - len(elem) < 3) for elem in COMMON_IMPLIED_ELEMENTS):
+        if resolution_kind == 'implied':
             if ing_amount_ml is not None and ing_amount_ml > 0:
                 print(f"  Info: '{ing_name_raw}' has liquid amount but is considered an implied/non-dispensable element. Skipping for dispense.")
             else:
                 print(f"  Info: Skipping implied non-dispensable ingredient '{ing_name_raw}'.")
             
             # Add as a written instruction if it's not a generic instruction itself
-            is_generic_instruction_term = any(elem == ing_name_lower for elem in ['ice', 'sugar', 'salt', 'water', 'none']) # Add other generic terms if needed
+            is_generic_instruction_term = resolution_detail
             
             if not is_generic_instruction_term:
                 instruction_message_parts = []
                 # Only add amount/unit if they're not part of the common elements list and are present
-                if ing.get('amount') is not None and str(ing.get('amount')).lower().strip() not in COMMON_IMPLIED_ELEMENTS and str(ing.get('amount')).lower().strip() != 'none':
+                if ing.get('amount') is not None and str(ing.get('amount')).lower().strip() not in implied_elements and str(ing.get('amount')).lower().strip() != 'none':
                     instruction_message_parts.append(str(ing['amount']))
-                if ing.get('unit') is not None and str(ing.get('unit')).lower().strip() not in COMMON_IMPLIED_ELEMENTS and str(ing.get('unit')).lower().strip() != 'none':
+                if ing.get('unit') is not None and str(ing.get('unit')).lower().strip() not in implied_elements and str(ing.get('unit')).lower().strip() != 'none':
                     instruction_message_parts.append(str(ing['unit']))
                 
                 instruction_message_parts.append(ing_name_raw) # Always include the ingredient name
@@ -360,46 +435,28 @@ def build_cocktailpi_recipe_payload(scraped_recipe, ingredient_mapping, default_
                     })
             continue # Move to next ingredient
 
-
-        # --- Mapping Logic Hierarchy ---
-
-        # 1. Check for a direct match in CocktailPi's current ingredients (exact name)
-        if ing_name_lower in ingredient_mapping:
-            cocktailpi_ingredient_id = ingredient_mapping[ing_name_lower]
-            mapped_cocktailpi_name = ing_name_lower
-            print(f"  Info: Direct matched '{ing_name_raw}' to CocktailPi ingredient '{mapped_cocktailpi_name}'.")
-
-        # 2. Apply INGREDIENT_CLASSIFICATION_RULES (Smart Group/Specific Mapping)
-        # This attempts to map to a broader category/group in CocktailPi
-        if not cocktailpi_ingredient_id:
-            for keyword, target_cp_name in INGREDIENT_CLASSIFICATION_RULES.items():
-                if keyword in ing_name_lower:
-                    if target_cp_name in ingredient_mapping:
-                        cocktailpi_ingredient_id = ingredient_mapping[target_cp_name]
-                        mapped_cocktailpi_name = target_cp_name
-                        print(f"  Info: Classified '{ing_name_raw}' as '{keyword}', mapped to CocktailPi ingredient/group '{target_cp_name}'.")
-                        break # Found a classification match, no need to check other rules for this ingredient
-
-        # 3. Fallback to fuzzy matching (simple 'in' check, less reliable but catches some)
-        if not cocktailpi_ingredient_id:
-            for cp_name, cp_id in ingredient_mapping.items():
-                if (ing_name_lower in cp_name or cp_name in ing_name_lower) and \
-                   (len(ing_name_lower) > 3 or len(cp_name) > 3): # Avoid matching very short, generic words
-                    cocktailpi_ingredient_id = cp_id
-                    mapped_cocktailpi_name = cp_name
-                    print(f"  Info: Fuzzy matched '{ing_name_raw}' to CocktailPi ingredient '{mapped_cocktailpi_name}'.")
-                    break
+        if resolution_kind == 'mapped':
+            cocktailpi_ingredient_id = resolved_id
+            mapped_cocktailpi_name = resolved_name
+            if resolution_detail == 'direct':
+                print(f"  Info: Direct matched '{ing_name_raw}' to CocktailPi ingredient '{mapped_cocktailpi_name}'.")
+            elif resolution_detail == 'fuzzy':
+                print(f"  Info: Fuzzy matched '{ing_name_raw}' to CocktailPi ingredient '{mapped_cocktailpi_name}'.")
+            else:
+                print(f"  Info: Classified '{ing_name_raw}' as '{resolution_detail}', mapped to CocktailPi ingredient/group '{mapped_cocktailpi_name}'.")
         
         # --- Handle Unmapped Liquid Ingredients: Auto-Create if Applicable ---
         if ing_amount_ml is not None and ing_amount_ml > 0 and not cocktailpi_ingredient_id:
             # The name for auto-creation should be the original scraped name (raw case)
             ingredient_to_create_name = ing_name_raw.strip()
 
-            if DEFAULT_PARENT_GROUP_ID is None:
+            if create_ingredient is None:
+                print(f"  Warning: Ingredient '{ing_name_raw}' could not be matched. Auto-creation disabled for this run. Will not be dispensed.")
+            elif DEFAULT_PARENT_GROUP_ID is None:
                 print(f"  Warning: Ingredient '{ing_name_raw}' could not be matched. Auto-creation skipped: No default parent group ID found.")
             else:
                 print(f"  Attempting to auto-create missing liquid ingredient '{ingredient_to_create_name}'...")
-                new_cp_ingredient = create_cocktailpi_ingredient(
+                new_cp_ingredient = create_ingredient(
                     ingredient_to_create_name, # Use the raw name for creation
                     ingredient_type=AUTO_CREATE_DEFAULTS['type'],
                     alcohol_content=AUTO_CREATE_DEFAULTS['alcoholContent'],
@@ -411,11 +468,12 @@ def build_cocktailpi_recipe_payload(scraped_recipe, ingredient_mapping, default_
                     cocktailpi_ingredient_id = new_cp_ingredient['id']
                     # Add newly created ingredient to our local map for subsequent recipes in this run
                     ingredient_mapping[new_cp_ingredient['name'].lower().strip()] = cocktailpi_ingredient_id
+                    invalidate_resolution_cache() # Earlier outcomes may now resolve to the new ingredient
                     mapped_cocktailpi_name = new_cp_ingredient['name'].lower().strip()
                 else:
                     print(f"  Warning: Ingredient '{ing_name_raw}' has a liquid amount but could not be matched/created. Will not be dispensed.")
         elif ing_amount_ml is not None and ing_amount_ml > 0 and not cocktailpi_ingredient_id:
-             # This branch is for cases where auto-creation was deemed unsuitable (e.g., in COMMON_IMPLIED_ELEMENTS)
+             # This branch is for cases where auto-creation was deemed unsuitable (e.g., an implied element)
              print(f"  Warning: Ingredient '{ing_name_raw}' has a liquid amount but could not be matched. Not suitable for auto-creation. Will not be dispensed.")
 
 
@@ -430,15 +488,15 @@ def build_cocktailpi_recipe_payload(scraped_recipe, ingredient_mapping, default_
             })
         elif not cocktailpi_ingredient_id: # If still no ID for this ingredient, add as written instruction
             # This 'else' covers cases where it's a liquid ingredient but couldn't be matched/created,
-            # or it's a non-liquid ingredient that wasn't covered by COMMON_IMPLIED_ELEMENTS
+            # or it's a non-liquid ingredient that wasn't covered by the implied elements
             instruction_message_parts = []
-            if ing.get('amount') is not None and str(ing.get('amount')).lower().strip() not in COMMON_IMPLIED_ELEMENTS and str(ing.get('amount')).lower().strip() != 'none':
+            if ing.get('amount') is not None and str(ing.get('amount')).lower().strip() not in implied_elements and str(ing.get('amount')).lower().strip() != 'none':
                 instruction_message_parts.append(str(ing['amount']))
-            if ing.get('unit') is not None and str(ing.get('unit')).lower().strip() not in COMMON_IMPLIED_ELEMENTS and str(ing.get('unit')).lower().strip() != 'none':
+            if ing.get('unit') is not None and str(ing.get('unit')).lower().strip() not in implied_elements and str(ing.get('unit')).lower().strip() != 'none':
                 instruction_message_parts.append(str(ing['unit']))
             
             # Ensure the ingredient name itself is not just a general instruction (like 'ice')
-            if ing_name_lower not in [elem.lower() for elem in COMMON_IMPLIED_ELEMENTS]:
+            if ing_name_lower not in implied_elements:
                 instruction_message_parts.append(ing_name_raw)
 
             if instruction_message_parts:
@@ -447,7 +505,7 @@ def build_cocktailpi_recipe_payload(scraped_recipe, ingredient_mapping, default_
                     "message": f"Add {' '.join(instruction_message_parts).strip()}"
                 })
             else:
-                # This case should ideally be caught by COMMON_IMPLIED_ELEMENTS check earlier
+                # This case should ideally be caught by implied elements check earlier
                 print(f"  Info: No meaningful instruction for '{ing_name_raw}', skipping as written instruction.")
 
 
@@ -470,7 +528,7 @@ def build_cocktailpi_recipe_payload(scraped_recipe, ingredient_mapping, default_
     if not production_steps:
         production_steps.append({
             "type": "writtenInstruction",
-            "message": "No specific instructions found for this recipe. Combine ingredients and serve."
+            "message": NO_INSTRUCTIONS_MESSAGE
         })
 
     payload = {
@@ -478,17 +536,162 @@ def build_cocktailpi_recipe_payload(scraped_recipe, ingredient_mapping, default_
         "ownerId": 1, # Default owner is usually 'Bar' with ID 1
         "description": description,
         "productionSteps": production_steps,
-        "defaultGlassId": default_glass_id,
-        "categoryIds": [default_category_id] # Temporarily still using default, will enhance soon
+        "defaultGlassId": glass_id,
+        "categoryIds": [category_id]
     }
     
     return payload
 
+# --- Check that a payload carries more than the generic fallback step ---
+def has_meaningful_steps(cocktailpi_payload):
+    for step in cocktailpi_payload['productionSteps']:
+        if step['type'] == 'addIngredients' and step['stepIngredients']:
+            return True
+        if step['type'] == 'writtenInstruction' and step['message'] != NO_INSTRUCTIONS_MESSAGE:
+            return True
+    return False
+
+# --- POST one recipe payload to CocktailPi; returns True if it was imported ---
+# When a controller (adaptive_concurrency.AIMDController) is given, the request's latency and
+# whether the server looked overloaded (5xx, timeout, connection error) are fed back to it. With a
+# reporter (progress.ProgressReporter), the request is recorded in its 'post' stage; with a failure
+# queue (failure_queue.FailureQueue), a failed POST is queued for retry together with its payload.
+def post_recipe_payload(cocktailpi_payload, controller=None, reporter=None, failures=None):
+    cocktail_name = cocktailpi_payload['name']
+    failure = None # (error, kind) when the POST fails
+    recipe_json_string = json.dumps(cocktailpi_payload)
+    files_to_send = {
+        'recipe': ('blob', recipe_json_string, 'application/json')
+    }
+
+    start_time = time.monotonic()
+    overloaded = False
+    imported = False
+    if reporter is not None:
+        reporter.start('post')
+    try:
+        import_headers = {
+            'Authorization': f"{token_type} {access_token}",
+            'Accept': 'application/json'
+        }
+        import_response = get_session().post(RECIPE_API_URL, files=files_to_send, headers=import_headers, timeout=RECIPE_POST_TIMEOUT)
+        
+        if import_response.status_code in [200, 201]:
+            print(f"  Successfully imported '{cocktail_name}'!")
+            imported = True
+        else:
+            overloaded = import_response.status_code >= 500
+            print(f"  Failed to import '{cocktail_name}' (Status: {import_response.status_code})")
+            print(f"  API Response: {import_response.text}")
+            failure = (f"HTTP {import_response.status_code}: {import_response.text}", classify_status(import_response.status_code))
+    except requests.exceptions.Timeout as e:
+        overloaded = True
+        print(f"  Error: CocktailPi did not answer within {RECIPE_POST_TIMEOUT}s while importing '{cocktail_name}'.")
+        failure = (f"Timeout: {e}", classify_exception(e))
+    except requests.exceptions.ConnectionError as e:
+        overloaded = True
+        print(f"  Error: Could not connect to CocktailPi at {BASE_URL} while importing '{cocktail_name}'.")
+        failure = (f"Connection error: {e}", classify_exception(e))
+    except Exception as e:
+        print(f"  An unexpected error occurred during import of '{cocktail_name}': {e}")
+        failure = (f"Unexpected error: {e}", classify_exception(e))
+
+    latency = time.monotonic() - start_time
+    if controller is not None:
+        controller.record(latency, overloaded=overloaded)
+    if reporter is not None:
+        reporter.finish('post', ok=imported, duration=latency)
+    if failures is not None:
+        if imported:
+            failures.resolve('import', cocktail_name.lower())
+        else:
+            error, kind = failure
+            failures.record('import', cocktail_name.lower(), error, kind, item=cocktailpi_payload, name=cocktail_name)
+    return imported
+
+# --- Run post_recipe_payload on a worker thread once the controller has a free slot ---
+def submit_recipe_payload(pool, controller, cocktailpi_payload, reporter=None, failures=None):
+    controller.acquire() # Blocks while the adaptive in-flight limit is reached
+    try:
+        future = pool.submit(post_recipe_payload, cocktailpi_payload, controller, reporter, failures)
+    except Exception:
+        controller.release()
+        raise
+    future.add_done_callback(lambda _: controller.release())
+    return future
+
+# --- Replay a bundle written by export_bundle.py through the adaptive POST pool ---
+# The payloads already carry ingredient, glass and category IDs from the reference snapshot they were
+# built against, so nothing is fetched or resolved here beyond the duplicate check.
+def import_recipe_bundle(bundle, existing_recipe_names, max_concurrency=MAX_IMPORT_CONCURRENCY, reporter=None, failures=None):
+    counts = {'imported': 0, 'duplicates': 0, 'failed': 0}
+    controller = AIMDController(max_limit=max_concurrency)
+    pending_imports = []
+    with ThreadPoolExecutor(max_workers=max_concurrency) as import_pool:
+        for payload in bundle['recipes']:
+            name_lower = payload['name'].lower()
+            if name_lower in existing_recipe_names:
+                print(f"  Skipping '{payload['name']}' - Recipe already exists (duplicate detected).")
+                counts['duplicates'] += 1
+                if reporter is not None:
+                    reporter.finish('recipes', started=False)
+                continue
+            existing_recipe_names.add(name_lower)
+            future = submit_recipe_payload(import_pool, controller, payload, reporter, failures)
+            if reporter is not None:
+                future.add_done_callback(lambda f: reporter.finish('recipes', ok=f.result(), started=False))
+            pending_imports.append(future)
+
+        for future in pending_imports:
+            counts['imported' if future.result() else 'failed'] += 1
+    print(f"\nImport concurrency at the end: {controller.describe()}")
+    return counts
+
 # --- Main execution flow ---
-if __name__ == '__main__':
+def main():
+    parser = argparse.ArgumentParser(description="Import scraped cocktails into CocktailPi.")
+    parser.add_argument('--data', default=COCKTAILS_DATA_FILE, help="Scraped cocktails (JSON or compact .db store)")
+    parser.add_argument('--max-concurrency', type=int, default=MAX_IMPORT_CONCURRENCY,
+                        help="Upper bound for parallel recipe POSTs")
+    parser.add_argument('--summary', default=IMPORT_RUN_SUMMARY_FILE, help="Where to write the machine-readable run summary")
+    parser.add_argument('--failure-queue', default=FAILURE_QUEUE_FILE,
+                        help="Failed POSTs are queued here; retry them with 'python failure_queue.py retry'")
+    parser.add_argument('--bundle', default=None,
+                        help="Import a recipe bundle written by export_bundle.py instead of scraped data; "
+                             "its IDs must come from a snapshot of this server")
+    args = parser.parse_args()
+
     if not login():
         exit()
 
+    if args.bundle:
+        from export_bundle import load_recipe_bundle # Imports this module; loaded lazily to avoid the cycle
+        try:
+            bundle = load_recipe_bundle(args.bundle)
+        except FileNotFoundError:
+            print(f"Error: {args.bundle} not found. Please run export_bundle.py first.")
+            exit()
+        except ValueError as e:
+            print(f"Error: Could not read recipe bundle {args.bundle}: {e}")
+            exit()
+
+        existing_recipe_names = fetch_existing_recipe_names()
+        print(f"Found {len(existing_recipe_names)} existing recipes on CocktailPi.")
+        reporter = ProgressReporter(len(bundle['recipes']), 'recipes', label='recipes')
+        with reporter:
+            counts = import_recipe_bundle(bundle, existing_recipe_names, args.max_concurrency, reporter,
+                                          FailureQueue(args.failure_queue))
+
+        print(f"\n--- Bundle Import Summary ---")
+        print(f"Payloads in bundle: {len(bundle['recipes'])}")
+        print(f"Recipes successfully imported: {counts['imported']}")
+        print(f"Recipes skipped (due to being duplicates): {counts['duplicates']}")
+        print(f"Recipes failed to import: {counts['failed']}")
+        if counts['failed']:
+            print(f"Failed recipes are queued in {args.failure_queue}; run 'python failure_queue.py retry' to retry them.")
+        reporter.write_summary(args.summary, extra=dict(counts, bundle=args.bundle))
+        return
+
     # ingredient_map now also includes group_name_to_id for default parent group finding
     ingredient_map, glass_map, category_map = fetch_cocktailpi_data()
 
@@ -496,131 +699,112 @@ if __name__ == '__main__':
         print("Could not retrieve CocktailPi ingredients. Cannot proceed with recipe import.")
         exit()
     
-    # Default Glass ID (can be made dynamic later based on volume)
-    DEFAULT_GLASS_ID = 1 # Fallback to 1 if no common glass names found
-    if glass_map:
-        # Prioritize common cocktail glasses by name
-        DEFAULT_GLASS_ID = glass_map.get('cocktail glass',
-                             glass_map.get('coupe',
-                             glass_map.get('old fashioned glass',
-                             glass_map.get('highball glass',
-                             glass_map.get('shot glass', list(glass_map.values())[0] if glass_map else 1)))))
-    print(f"Using default glass ID: {DEFAULT_GLASS_ID} (from map or fallback)")
-
-
-    # Default Category ID (will be replaced by intelligent categorization)
-    DEFAULT_CATEGORY_ID = 7 # Fallback to 7 (often 'Other' or 'Classic')
-    if category_map:
-        # Prioritize 'Classic' or 'Other'
-        DEFAULT_CATEGORY_ID = category_map.get('classic',
-                                   category_map.get('other',
-                                   list(category_map.values())[0] if category_map else 7))
-    print(f"Using default category ID: {DEFAULT_CATEGORY_ID} (from map or fallback)")
+    # Fallbacks for recipes the glass/category inference cannot place
+    default_glass_id = choose_default_glass_id(glass_map)
+    print(f"Using default glass ID: {default_glass_id} (from map or fallback)")
+
+    default_category_id = choose_default_category_id(category_map)
+    print(f"Using default category ID: {default_category_id} (from map or fallback)")
 
 
     try:
-        with open(COCKTAILS_DATA_FILE, 'r', encoding='utf-8') as f:
-            cocktails_to_import = json.load(f)
-        print(f"\nLoaded {len(cocktails_to_import)} recipes from {COCKTAILS_DATA_FILE}")
+        cocktails_to_import = load_cocktails(args.data) # JSON or the compact .db store
+        print(f"\nLoaded {len(cocktails_to_import)} recipes from {args.data}")
     except FileNotFoundError:
-        print(f"Error: {COCKTAILS_DATA_FILE} not found. Please run scrape_cocktail_details.py first.")
+        print(f"Error: {args.data} not found. Please run scrape_cocktail_details.py first.")
         exit()
     except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from {COCKTAILS_DATA_FILE}. Check file content.")
+        print(f"Error: Could not decode JSON from {args.data}. Check file content.")
         exit()
     except Exception as e:
-        print(f"An unexpected error occurred loading {COCKTAILS_DATA_FILE}: {e}")
+        print(f"An unexpected error occurred loading {args.data}: {e}")
         exit()
 
     # --- Fetch existing recipe names to prevent duplicates ---
     print("\nFetching existing recipes to check for duplicates...")
-    existing_recipes_data = authenticated_get('recipe/')
-
-    existing_recipe_names = set()
-    if existing_recipes_data and isinstance(existing_recipes_data, dict) and 'content' in existing_recipes_data:
-        for recipe_dict in existing_recipes_data['content']:
-            if isinstance(recipe_dict, dict) and 'name' in recipe_dict:
-                existing_recipe_names.add(recipe_dict['name'].lower().strip())
-        print(f"  Detected existing recipes as a dictionary with 'content' key.")
-    else:
-        print(f"  Warning: Unexpected structure for existing recipes data. Cannot check for duplicates effectively. Data type: {type(existing_recipes_data)}")
-        # If it's not the expected dictionary structure, existing_recipe_names will remain empty,
-        # which means all recipes will be attempted for import, potentially leading to duplicates.
-
+    existing_recipe_names = fetch_existing_recipe_names()
     print(f"Found {len(existing_recipe_names)} existing recipes on CocktailPi.")
 
 
+    # Glass by total volume and category by ingredient profile, assigned for the whole dataset up front
+    inference_tables = InferenceTables(glass_map, category_map, default_glass_id, default_category_id)
+    glass_and_category_ids = infer_for_dataset(inference_tables, cocktails_to_import)
+
     print("\n--- Starting Recipe Import ---")
     imported_count = 0
     skipped_count = 0
     duplicate_count = 0
-
-    for i, cocktail in enumerate(cocktails_to_import):
-        cocktail_name = cocktail.get('name', 'Unnamed Recipe').strip()
-        cocktail_name_lower = cocktail_name.lower()
-        print(f"\nProcessing recipe {i+1}/{len(cocktails_to_import)}: '{cocktail_name}'")
-
-        if not cocktail_name or (not cocktail.get('ingredients') and not cocktail.get('preparation')):
-            print(f"  Skipping '{cocktail_name}' - no valid name or no ingredients/preparation found in scraped data.")
-            skipped_count += 1
-            continue
-        
-        if cocktail_name_lower in existing_recipe_names:
-            print(f"  Skipping '{cocktail_name}' - Recipe already exists (duplicate detected).")
-            duplicate_count += 1
-            continue
-
-        cocktailpi_payload = build_cocktailpi_recipe_payload(
-            cocktail, ingredient_map, DEFAULT_GLASS_ID, DEFAULT_CATEGORY_ID
-        )
-
-        # Check if the generated payload has any meaningful steps before attempting to import
-        has_meaningful_steps = False
-        for step in cocktailpi_payload['productionSteps']:
-            if step['type'] == 'addIngredients' and step['stepIngredients']:
-                has_meaningful_steps = True
-                break
-            if step['type'] == 'writtenInstruction' and step['message'] != "No specific instructions found for this recipe. Combine ingredients and serve.":
-                has_meaningful_steps = True
-                break
-        
-        if not has_meaningful_steps:
-            print(f"  Skipping '{cocktail_name}' - generated payload contains no meaningful dispense or instruction steps.")
-            skipped_count += 1
-            continue
-
-        recipe_json_string = json.dumps(cocktailpi_payload)
-        files_to_send = {
-            'recipe': ('blob', recipe_json_string, 'application/json')
-        }
-
-        print(f"  Attempting to import '{cocktail_name}'...")
-        try:
-            import_headers = {
-                'Authorization': f"{token_type} {access_token}",
-                'Accept': 'application/json'
-            }
-            import_response = session.post(RECIPE_API_URL, files=files_to_send, headers=import_headers)
+    failed_count = 0
+
+    # Payloads are built here one by one (auto-creation updates ingredient_map), while the POSTs run
+    # on worker threads; the controller adapts how many are in flight to how the Pi is coping.
+    import_controller = AIMDController(max_limit=args.max_concurrency)
+    pending_imports = []
+    reporter = ProgressReporter(len(cocktails_to_import), 'recipes', label='recipes')
+    failures = FailureQueue(args.failure_queue)
+
+    with reporter, ThreadPoolExecutor(max_workers=args.max_concurrency) as import_pool:
+        for i, cocktail in enumerate(cocktails_to_import):
+            cocktail_name = cocktail.get('name', 'Unnamed Recipe').strip()
+            cocktail_name_lower = cocktail_name.lower()
+            print(f"\nProcessing recipe {i+1}/{len(cocktails_to_import)}: '{cocktail_name}' ({import_controller.describe()})")
+
+            if not cocktail_name or (not cocktail.get('ingredients') and not cocktail.get('preparation')):
+                print(f"  Skipping '{cocktail_name}' - no valid name or no ingredients/preparation found in scraped data.")
+                skipped_count += 1
+                reporter.finish('recipes', started=False)
+                continue
             
-            if import_response.status_code in [200, 201]:
-                print(f"  Successfully imported '{cocktail_name}'!")
+            if cocktail_name_lower in existing_recipe_names:
+                print(f"  Skipping '{cocktail_name}' - Recipe already exists (duplicate detected).")
+                duplicate_count += 1
+                reporter.finish('recipes', started=False)
+                continue
+
+            glass_id, category_id = glass_and_category_ids[i]
+            with reporter.track('build'):
+                cocktailpi_payload = build_cocktailpi_recipe_payload(
+                    cocktail, ingredient_map, glass_id, category_id
+                )
+
+            # Check if the generated payload has any meaningful steps before attempting to import
+            if not has_meaningful_steps(cocktailpi_payload):
+                print(f"  Skipping '{cocktail_name}' - generated payload contains no meaningful dispense or instruction steps.")
+                skipped_count += 1
+                reporter.finish('recipes', started=False)
+                continue
+
+            print(f"  Attempting to import '{cocktail_name}'...")
+            # Claimed right away so a same-named recipe later in the file is treated as a duplicate
+            existing_recipe_names.add(cocktail_name_lower)
+            future = submit_recipe_payload(import_pool, import_controller, cocktailpi_payload, reporter, failures)
+            future.add_done_callback(lambda f: reporter.finish('recipes', ok=f.result(), started=False))
+            pending_imports.append(future)
+
+        for future in pending_imports:
+            if future.result():
                 imported_count += 1
-                existing_recipe_names.add(cocktail_name_lower) # Add to prevent duplicates within the same run
             else:
-                print(f"  Failed to import '{cocktail_name}' (Status: {import_response.status_code})")
-                print(f"  API Response: {import_response.text}")
-                skipped_count += 1
-        except requests.exceptions.ConnectionError:
-            print(f"  Error: Could not connect to CocktailPi at {BASE_URL} while importing '{cocktail_name}'.")
-            skipped_count += 1
-        except Exception as e:
-            print(f"  An unexpected error occurred during import of '{cocktail_name}': {e}")
-            skipped_count += 1
-        
-        time.sleep(0.5) # Small delay to avoid overwhelming the API
+                failed_count += 1
 
+    print(f"\nImport concurrency at the end: {import_controller.describe()}")
     print(f"\n--- Import Summary ---")
     print(f"Total recipes processed: {len(cocktails_to_import)}")
     print(f"Recipes successfully imported: {imported_count}")
-    print(f"Recipes skipped (due to missing data or import error): {skipped_count}")
+    print(f"Recipes skipped (due to missing data or no meaningful steps): {skipped_count}")
     print(f"Recipes skipped (due to being duplicates): {duplicate_count}")
+    print(f"Recipes failed to import: {failed_count}")
+    if failed_count:
+        print(f"Failed recipes are queued in {args.failure_queue}; run 'python failure_queue.py retry' to retry them.")
+
+    reporter.write_summary(args.summary, extra={
+        'imported': imported_count,
+        'skipped': skipped_count,
+        'duplicates': duplicate_count,
+        'failed': failed_count,
+        'importConcurrency': {'finalLimit': round(import_controller.limit, 2), 'smoothedLatency': import_controller.smoothed_latency,
+                              'overloadedResponses': import_controller.overloads, 'requests': import_controller.requests},
+    })
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import threading
+import time
+
+# --- Configuration ---
+DEFAULT_TARGET_LATENCY = 2.0 # Seconds per recipe POST considered healthy for a Pi
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 8
+DEFAULT_DECREASE_FACTOR = 0.5 # Multiplicative decrease on overload
+LATENCY_SMOOTHING = 0.2 # Weight of the newest sample in the latency moving average
+
+class AIMDController:
+    """
+    Additive-increase/multiplicative-decrease limit on in-flight requests, like TCP congestion control.
+    Every healthy response raises the limit by 1/limit (about +1 per round of requests); a 5xx, timeout
+    or connection error, or a smoothed latency above the target, halves it. Decreases are applied at
+    most once per smoothed latency interval, so one burst of failures counts as one overload signal.
+
+    Use it as a context manager around each request (blocks while the limit is reached) and call
+    record() with the outcome of the request.
+    """
+
+    def __init__(self, initial_limit=DEFAULT_MIN_LIMIT, min_limit=DEFAULT_MIN_LIMIT, max_limit=DEFAULT_MAX_LIMIT,
+                 target_latency=DEFAULT_TARGET_LATENCY, decrease_factor=DEFAULT_DECREASE_FACTOR):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.smoothed_latency = None
+        self.requests = 0
+        self.overloads = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    # --- Slot handling ---
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    # --- Feedback ---
+    def record(self, latency, overloaded=False):
+        """Feeds back one finished request: its latency in seconds and whether the server showed overload."""
+        with self._condition:
+            self.requests += 1
+            if latency is not None:
+                if self.smoothed_latency is None:
+                    self.smoothed_latency = latency
+                else:
+                    self.smoothed_latency += LATENCY_SMOOTHING * (latency - self.smoothed_latency)
+
+            too_slow = self.smoothed_latency is not None and self.smoothed_latency > self.target_latency
+            if overloaded or too_slow:
+                if overloaded:
+                    self.overloads += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= (self.smoothed_latency or 0.0):
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def describe(self):
+        latency = f"{self.smoothed_latency:.2f}s" if self.smoothed_latency is not None else "n/a"
+        return (f"limit {self.limit:.1f} ({self.in_flight} in flight), smoothed latency {latency}, "
+                f"{self.overloads}/{self.requests} overloaded responses")
@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import sqlite3
+from urllib.parse import quote
+
+# --- Compact SQLite storage for the scraped corpus ---
+# The JSON output repeats every key name and is parsed in full on load. This store keeps one row per
+# ingredient line with the ingredient name interned, indexes cocktails by name and URL, and can be
+# scanned row by row, so tools get random access and low-memory iteration.
+
+CORPUS_SCHEMA_VERSION = 1
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+# Keys stored in their own columns; anything else a cocktail carries is kept as JSON in 'extra'
+CORE_COCKTAIL_KEYS = ('name', 'url', 'description', 'ingredients', 'preparation')
+
+# 'amount' and 'unit' are declared without a type so SQLite keeps numbers as numbers and text as text
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS ingredient_names (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS cocktails (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    url TEXT,
+    description TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cocktails_name ON cocktails (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_cocktails_url ON cocktails (url);
+CREATE TABLE IF NOT EXISTS cocktail_ingredients (
+    cocktail_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    amount,
+    unit,
+    name_id INTEGER NOT NULL REFERENCES ingredient_names (id),
+    unit_ml REAL,
+    PRIMARY KEY (cocktail_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS preparation_steps (
+    cocktail_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    step TEXT NOT NULL,
+    PRIMARY KEY (cocktail_id, position)
+) WITHOUT ROWID;
+"""
+
+def is_corpus_db(path):
+    return str(path).lower().endswith(SQLITE_SUFFIXES)
+
+def open_corpus_db(path, create=False):
+    """
+    Opens the store at path. Readers get a read-only connection and a FileNotFoundError for a missing
+    file; only create=True (used by write_corpus_db) makes the file and its schema.
+    """
+    if not create:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        conn = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        except sqlite3.DatabaseError as e: # No meta table, or not an SQLite file at all
+            conn.close()
+            raise ValueError(f"{path} is not a cocktail corpus store: {e}")
+        if row is None or int(row[0]) != CORPUS_SCHEMA_VERSION:
+            conn.close()
+            raise ValueError(f"Unsupported corpus schema version {row[0] if row else None} in {path}")
+        return conn
+
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    if row is None:
+        conn.execute("INSERT INTO meta (key, value) VALUES ('schema_version', ?)", (str(CORPUS_SCHEMA_VERSION),))
+        conn.commit()
+    elif int(row[0]) != CORPUS_SCHEMA_VERSION:
+        conn.close()
+        raise ValueError(f"Unsupported corpus schema version {row[0]} in {path}")
+    return conn
+
+# --- Writing ---
+def write_corpus_db(cocktails, path):
+    """Replaces the contents of the store at path with the given list of cocktail detail dicts."""
+    conn = open_corpus_db(path, create=True)
+    try:
+        with conn:
+            conn.execute("DELETE FROM preparation_steps")
+            conn.execute("DELETE FROM cocktail_ingredients")
+            conn.execute("DELETE FROM cocktails")
+            conn.execute("DELETE FROM ingredient_names")
+            name_ids = {}
+            for cocktail in cocktails:
+                _insert_cocktail(conn, cocktail, name_ids)
+    finally:
+        conn.close()
+    print(f"Saved {len(cocktails)} cocktails to {path}")
+
+def _intern_ingredient_name(conn, name, name_ids):
+    name_id = name_ids.get(name)
+    if name_id is None:
+        row = conn.execute("SELECT id FROM ingredient_names WHERE name = ?", (name,)).fetchone()
+        name_id = row[0] if row else conn.execute("INSERT INTO ingredient_names (name) VALUES (?)", (name,)).lastrowid
+        name_ids[name] = name_id
+    return name_id
+
+def _insert_cocktail(conn, cocktail, name_ids):
+    extra = {key: value for key, value in cocktail.items() if key not in CORE_COCKTAIL_KEYS}
+    cocktail_id = conn.execute(
+        "INSERT INTO cocktails (name, url, description, extra) VALUES (?, ?, ?, ?)",
+        (cocktail.get('name', ''), cocktail.get('url'), cocktail.get('description', ''),
+         json.dumps(extra, ensure_ascii=False) if extra else None)
+    ).lastrowid
+
+    conn.executemany(
+        "INSERT INTO cocktail_ingredients (cocktail_id, position, amount, unit, name_id, unit_ml) VALUES (?, ?, ?, ?, ?, ?)",
+        [(cocktail_id, position, ing.get('amount'), ing.get('unit'),
+          _intern_ingredient_name(conn, ing.get('name', ''), name_ids), ing.get('unit_ml'))
+         for position, ing in enumerate(cocktail.get('ingredients', []))]
+    )
+    conn.executemany(
+        "INSERT INTO preparation_steps (cocktail_id, position, step) VALUES (?, ?, ?)",
+        [(cocktail_id, position, step) for position, step in enumerate(cocktail.get('preparation', []))]
+    )
+    return cocktail_id
+
+# --- Reading ---
+def _row_to_cocktail(conn, row):
+    cocktail_id, name, url, description, extra = row
+    cocktail = {'name': name, 'url': url, 'description': description}
+    cocktail['ingredients'] = [
+        {'amount': amount, 'unit': unit, 'name': ing_name, 'unit_ml': unit_ml}
+        for amount, unit, ing_name, unit_ml in conn.execute(
+            "SELECT ci.amount, ci.unit, n.name, ci.unit_ml FROM cocktail_ingredients ci "
+            "JOIN ingredient_names n ON n.id = ci.name_id WHERE ci.cocktail_id = ? ORDER BY ci.position",
+            (cocktail_id,))
+    ]
+    cocktail['preparation'] = [
+        step for (step,) in conn.execute(
+            "SELECT step FROM preparation_steps WHERE cocktail_id = ? ORDER BY position", (cocktail_id,))
+    ]
+    if extra:
+        cocktail.update(json.loads(extra))
+    return cocktail
+
+def iter_corpus_db(path):
+    """Yields cocktails one at a time in insertion order, without loading the whole corpus."""
+    conn = open_corpus_db(path)
+    try:
+        cursor = conn.execute("SELECT id, name, url, description, extra FROM cocktails ORDER BY id")
+        for row in cursor:
+            yield _row_to_cocktail(conn, row)
+    finally:
+        conn.close()
+
+def find_cocktail(path, name=None, url=None):
+    """Looks a cocktail up by name (case-insensitive) or URL using the indexes; returns None if absent."""
+    if name is None and url is None:
+        raise ValueError("find_cocktail() needs a name or a url")
+    conn = open_corpus_db(path)
+    try:
+        if name is not None:
+            row = conn.execute("SELECT id, name, url, description, extra FROM cocktails WHERE name = ? COLLATE NOCASE "
+                               "ORDER BY id LIMIT 1", (name,)).fetchone()
+        else:
+            row = conn.execute("SELECT id, name, url, description, extra FROM cocktails WHERE url = ? "
+                               "ORDER BY id LIMIT 1", (url,)).fetchone()
+        return _row_to_cocktail(conn, row) if row else None
+    finally:
+        conn.close()
+
+# --- Format-agnostic loading for the importer and tooling ---
+def load_cocktails(path):
+    """Loads the corpus from either the JSON output or a compact SQLite store, chosen by file extension."""
+    if is_corpus_db(path):
+        return list(iter_corpus_db(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_cocktails(cocktails, path):
+    """Saves the corpus as JSON or as a compact SQLite store, chosen by file extension."""
+    if is_corpus_db(path):
+        write_corpus_db(cocktails, path)
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cocktails, f, indent=4, ensure_ascii=False)
+    print(f"Saved {len(cocktails)} cocktails to {path}")
+
+# --- Main execution: convert between JSON and the compact store ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert the scraped cocktail corpus between JSON and the compact SQLite store.")
+    parser.add_argument('source', help="Input file (.json or .db/.sqlite)")
+    parser.add_argument('destination', help="Output file (.json or .db/.sqlite)")
+    args = parser.parse_args()
+
+    cocktails = load_cocktails(args.source)
+    print(f"Loaded {len(cocktails)} cocktails from {args.source}")
+    save_cocktails(cocktails, args.destination)
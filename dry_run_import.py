@@ -0,0 +1,135 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+import Import_Recipes as importer
+from export_bundle import build_recipe_bundle, load_scraped_cocktails
+
+# --- Configuration ---
+DRY_RUN_PAYLOADS_FILE = 'dry_run_payloads.json'
+DRY_RUN_REPORT_FILE = 'dry_run_report.json'
+
+# --- Stand-in for create_cocktailpi_ingredient() that never touches the server ---
+# Every "created" ingredient gets a negative placeholder ID so it can't collide with a real one,
+# and is remembered so the report can list what a live import would create.
+class IngredientCreationRecorder:
+    def __init__(self):
+        self.would_create = {} # name -> placeholder ID
+
+    def __call__(self, name, **kwargs):
+        placeholder_id = -(len(self.would_create) + 1)
+        self.would_create[name] = placeholder_id
+        return {'id': placeholder_id, 'name': name}
+
+# --- Summarise a payload as ingredient names and instruction messages, for diffing runs ---
+def summarize_payload(payload, id_to_name):
+    ingredients = []
+    instructions = []
+    for step in payload['productionSteps']:
+        if step['type'] == 'addIngredients':
+            for step_ingredient in step['stepIngredients']:
+                ingredient_id = step_ingredient['ingredientId']
+                ingredients.append(f"{id_to_name.get(ingredient_id, ingredient_id)} ({step_ingredient['amount']} ml)")
+        else:
+            instructions.append(step['message'])
+    return {'ingredients': ingredients, 'instructions': instructions}
+
+def diff_summaries(previous, current):
+    diff = {
+        'added': sorted(set(current) - set(previous)),
+        'removed': sorted(set(previous) - set(current)),
+        'changed': []
+    }
+    for name in sorted(set(current) & set(previous)):
+        old, new = previous[name], current[name]
+        if old == new:
+            continue
+        diff['changed'].append({
+            'name': name,
+            'ingredientsAdded': [i for i in new['ingredients'] if i not in old['ingredients']],
+            'ingredientsRemoved': [i for i in old['ingredients'] if i not in new['ingredients']],
+            'instructionsAdded': [i for i in new['instructions'] if i not in old['instructions']],
+            'instructionsRemoved': [i for i in old['instructions'] if i not in new['instructions']]
+        })
+    return diff
+
+# --- Run the whole corpus through mapping with zero network I/O ---
+def run_dry_run(cocktails, ingredient_map, glass_map, category_map, existing_recipe_names=(), verbose=False):
+    # Work on a copy so placeholder IDs never leak back into the snapshot maps
+    ingredient_map = dict(ingredient_map)
+    recorder = IngredientCreationRecorder()
+
+    start_time = time.perf_counter()
+    # The payload builder prints a line per ingredient; swallowing it keeps the tuning loop fast
+    output_sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output_sink:
+        bundle = build_recipe_bundle(cocktails, ingredient_map, glass_map, category_map,
+                                     existing_recipe_names, create_ingredient=recorder)
+    elapsed = time.perf_counter() - start_time
+
+    id_to_name = {cp_id: cp_name for cp_name, cp_id in ingredient_map.items()}
+    summaries = {payload['name']: summarize_payload(payload, id_to_name) for payload in bundle['recipes']}
+
+    would_create = {name: [] for name in recorder.would_create}
+    placeholder_names = {cp_id: name for name, cp_id in recorder.would_create.items()}
+    for payload in bundle['recipes']:
+        for step in payload['productionSteps']:
+            if step['type'] != 'addIngredients':
+                continue
+            for step_ingredient in step['stepIngredients']:
+                created_name = placeholder_names.get(step_ingredient['ingredientId'])
+                if created_name is not None and payload['name'] not in would_create[created_name]:
+                    would_create[created_name].append(payload['name'])
+
+    return bundle, summaries, would_create, elapsed
+
+# --- Main execution flow ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build and validate every CocktailPi payload offline, without creating anything.")
+    parser.add_argument('--data', default=importer.COCKTAILS_DATA_FILE, help="Scraped cocktails (JSON or compact .db store)")
+    parser.add_argument('--snapshot', default=importer.REFERENCE_SNAPSHOT_FILE, help="Reference snapshot of CocktailPi IDs")
+    parser.add_argument('--payloads', default=DRY_RUN_PAYLOADS_FILE,
+                        help="Where to write the payloads; the previous file there is used as the diff baseline")
+    parser.add_argument('--report', default=DRY_RUN_REPORT_FILE, help="Where to write the dry-run report")
+    parser.add_argument('--verbose', action='store_true', help="Show the per-ingredient mapping log")
+    args = parser.parse_args()
+
+    try:
+        ingredient_map, glass_map, category_map, existing_recipe_names = importer.load_reference_snapshot(args.snapshot)
+        cocktails = load_scraped_cocktails(args.data)
+    except FileNotFoundError as e:
+        print(f"Error: {e.filename} not found. Save a reference snapshot with export_bundle.py --refresh-snapshot and scrape first.")
+        exit()
+
+    previous_summaries = {}
+    if os.path.exists(args.payloads):
+        with open(args.payloads, 'r', encoding='utf-8') as f:
+            previous_summaries = json.load(f).get('summaries', {})
+
+    bundle, summaries, would_create, elapsed = run_dry_run(
+        cocktails, ingredient_map, glass_map, category_map, existing_recipe_names, verbose=args.verbose
+    )
+    diff = diff_summaries(previous_summaries, summaries)
+
+    with open(args.payloads, 'w', encoding='utf-8') as f:
+        json.dump({'recipes': bundle['recipes'], 'summaries': summaries}, f, indent=4, ensure_ascii=False)
+
+    report = {
+        'generatedAt': bundle['generatedAt'],
+        'elapsedSeconds': round(elapsed, 4),
+        'recipeCount': bundle['recipeCount'],
+        'skipped': bundle['skipped'],
+        'wouldCreate': [{'name': name, 'recipes': recipes} for name, recipes in sorted(would_create.items())],
+        'diff': diff
+    }
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+    print(f"\n--- Dry Run Summary ---")
+    print(f"Payloads built: {bundle['recipeCount']} in {elapsed:.3f}s ({len(bundle['skipped'])} skipped)")
+    print(f"Ingredients that would be created: {len(would_create)}")
+    print(f"Compared to previous run: {len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed")
+    print(f"Payloads saved to {args.payloads}, report saved to {args.report}")
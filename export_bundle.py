@@ -0,0 +1,110 @@
+import argparse
+import json
+import time
+
+import Import_Recipes as importer
+from corpus_store import load_cocktails
+from recipe_inference import InferenceTables, infer_for_dataset
+
+# --- Configuration ---
+BUNDLE_OUTPUT_FILE = 'cocktailpi_recipe_bundle.json'
+BUNDLE_FORMAT_VERSION = 1
+
+# --- Load the scraped recipes produced by scrape_cocktail_details.py ---
+def load_scraped_cocktails(path):
+    cocktails = load_cocktails(path)
+    print(f"Loaded {len(cocktails)} recipes from {path}")
+    return cocktails
+
+# --- Build every payload in one pass, resolving ingredient IDs from the reference snapshot only ---
+# By default nothing is created on the server: unmapped liquids end up as written instructions, exactly
+# like a live import where auto-creation failed. create_ingredient is passed through to the payload builder.
+def build_recipe_bundle(cocktails, ingredient_map, glass_map, category_map, existing_recipe_names=(),
+                        create_ingredient=None):
+    default_glass_id = importer.choose_default_glass_id(glass_map)
+    default_category_id = importer.choose_default_category_id(category_map)
+    inference_tables = InferenceTables(glass_map, category_map, default_glass_id, default_category_id)
+    glass_and_category_ids = infer_for_dataset(inference_tables, cocktails)
+
+    seen_names = set(existing_recipe_names)
+    recipes = []
+    skipped = []
+
+    for cocktail, (glass_id, category_id) in zip(cocktails, glass_and_category_ids):
+        cocktail_name = cocktail.get('name', 'Unnamed Recipe').strip()
+        cocktail_name_lower = cocktail_name.lower()
+
+        if not cocktail_name or (not cocktail.get('ingredients') and not cocktail.get('preparation')):
+            skipped.append({'name': cocktail_name, 'reason': 'no ingredients/preparation in scraped data'})
+            continue
+        if cocktail_name_lower in seen_names:
+            skipped.append({'name': cocktail_name, 'reason': 'duplicate'})
+            continue
+
+        payload = importer.build_cocktailpi_recipe_payload(
+            cocktail, ingredient_map, glass_id, category_id, create_ingredient=create_ingredient
+        )
+        if not importer.has_meaningful_steps(payload):
+            skipped.append({'name': cocktail_name, 'reason': 'no meaningful dispense or instruction steps'})
+            continue
+
+        recipes.append(payload)
+        seen_names.add(cocktail_name_lower)
+
+    return {
+        'version': BUNDLE_FORMAT_VERSION,
+        'generatedAt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'recipeCount': len(recipes),
+        'recipes': recipes,
+        'skipped': skipped
+    }
+
+def write_recipe_bundle(bundle, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        # Compact on purpose: the bundle is a machine artifact, not something to read by hand
+        json.dump(bundle, f, ensure_ascii=False, separators=(',', ':'))
+    print(f"Recipe bundle with {bundle['recipeCount']} payloads saved to {path} ({len(bundle['skipped'])} skipped)")
+
+# --- Read a bundle back for 'Import_Recipes.py --bundle' ---
+def load_recipe_bundle(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        bundle = json.load(f)
+    if not isinstance(bundle, dict) or bundle.get('version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {BUNDLE_FORMAT_VERSION} recipe bundle")
+    print(f"Loaded recipe bundle with {len(bundle['recipes'])} payloads from {path} (generated {bundle.get('generatedAt')})")
+    return bundle
+
+# --- Main execution flow ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export scraped cocktails as one bundle of CocktailPi recipe payloads.")
+    parser.add_argument('--data', default=importer.COCKTAILS_DATA_FILE, help="Scraped cocktails (JSON or compact .db store)")
+    parser.add_argument('--snapshot', default=importer.REFERENCE_SNAPSHOT_FILE, help="Reference snapshot of CocktailPi IDs")
+    parser.add_argument('--refresh-snapshot', action='store_true',
+                        help="Log in to CocktailPi once and refresh the reference snapshot before exporting")
+    parser.add_argument('--output', default=BUNDLE_OUTPUT_FILE, help="Where to write the recipe bundle")
+    args = parser.parse_args()
+
+    if args.refresh_snapshot:
+        if not importer.login():
+            exit()
+        ingredient_map, glass_map, category_map = importer.fetch_cocktailpi_data()
+        existing_recipe_names = importer.fetch_existing_recipe_names()
+        importer.save_reference_snapshot(args.snapshot, ingredient_map, glass_map, category_map, existing_recipe_names)
+
+    try:
+        ingredient_map, glass_map, category_map, existing_recipe_names = importer.load_reference_snapshot(args.snapshot)
+    except FileNotFoundError:
+        print(f"Error: {args.snapshot} not found. Run with --refresh-snapshot against a running CocktailPi first.")
+        exit()
+
+    try:
+        cocktails = load_scraped_cocktails(args.data)
+    except FileNotFoundError:
+        print(f"Error: {args.data} not found. Please run scrape_cocktail_details.py first.")
+        exit()
+    except json.JSONDecodeError:
+        print(f"Error: Could not decode JSON from {args.data}. Check file content.")
+        exit()
+
+    bundle = build_recipe_bundle(cocktails, ingredient_map, glass_map, category_map, existing_recipe_names)
+    write_recipe_bundle(bundle, args.output)
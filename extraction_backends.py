@@ -0,0 +1,260 @@
+import re
+import threading
+
+from bs4 import BeautifulSoup
+
+from scrape_cocktail_details import (
+    calculate_unit_ml,
+    extract_content_for_gemini,
+    extract_details_with_gemini,
+    get_gemini_model,
+)
+
+# --- Configuration ---
+GEMINI_MODEL_TIERS = {
+    'pro': 'models/gemini-1.5-pro-latest', # Most accurate, slowest and most expensive
+    'flash': 'models/gemini-1.5-flash-latest', # Much faster and cheaper; fine for most articles
+}
+DEFAULT_MODEL_TIER = 'pro'
+DEFAULT_EXTRACTION_BACKEND = 'tiered'
+BACKEND_CHOICES = ('tiered', 'local', 'gemini')
+MAX_DESCRIPTION_LENGTH = 500
+
+# --- Page extraction: one BeautifulSoup parse feeding every backend ---
+# Runs in the scrape pipeline's worker processes, so it returns plain dicts and strings only.
+def extract_page(html, section_id=None):
+    """
+    Returns {'text': article text for an LLM, 'infobox': {label: value}, 'lead': first paragraph}.
+    The infobox is left empty for section URLs: it belongs to the whole article, not to the cocktail.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    return {
+        'text': extract_content_for_gemini(soup, section_id),
+        'infobox': {} if section_id else parse_infobox(soup),
+        'lead': '' if section_id else _lead_paragraph(soup),
+    }
+
+def parse_infobox(soup):
+    """Returns the infobox rows as {lowercase label: value}; list cells become lists of strings."""
+    infobox = soup.find('table', class_='infobox')
+    if not infobox:
+        return {}
+    fields = {}
+    for row in infobox.find_all('tr'):
+        label_cell = row.find('th')
+        value_cell = row.find('td')
+        if not label_cell or not value_cell:
+            continue
+        label = _clean_text(label_cell.get_text(' ', strip=True)).lower()
+        items = value_cell.find_all('li')
+        if items:
+            fields[label] = [_clean_text(item.get_text(' ', strip=True)) for item in items]
+            continue
+        for line_break in value_cell.find_all('br'):
+            line_break.replace_with('\n')
+        lines = [_clean_text(line) for line in value_cell.get_text(' ').split('\n')]
+        lines = [line for line in lines if line]
+        fields[label] = lines if len(lines) > 1 else ' '.join(lines)
+    return fields
+
+def _lead_paragraph(soup):
+    content = soup.find('div', class_='mw-parser-output')
+    if not content:
+        return ''
+    for paragraph in content.find_all('p', recursive=False):
+        text = _clean_text(paragraph.get_text(' ', strip=True))
+        if text:
+            return text
+    return ''
+
+def _clean_text(text):
+    text = re.sub(r'\[.*?\]', '', text) # Wiki references like [1]
+    text = re.sub(r'\s+([,.;:])', r'\1', text)
+    return re.sub(r'\s+', ' ', text).strip().rstrip('†').strip()
+
+# --- Local extractor: infobox "Ingredients" and "Preparation" rows ---
+UNICODE_FRACTIONS = {'½': 0.5, '¼': 0.25, '¾': 0.75, '⅓': 1 / 3, '⅔': 2 / 3, '⅛': 0.125}
+UNIT_ALIASES = {
+    'fl oz': 'oz', 'fl. oz': 'oz', 'fl.oz': 'oz', 'ounce': 'oz', 'ounces': 'oz', 'oz.': 'oz',
+    'millilitre': 'ml', 'millilitres': 'ml', 'milliliter': 'ml', 'milliliters': 'ml',
+    'centilitre': 'cl', 'centilitres': 'cl', 'centiliter': 'cl', 'centiliters': 'cl',
+    'tbsp': 'tablespoon', 'tablespoons': 'tablespoon', 'teaspoons': 'teaspoon', 'tsps': 'tsp',
+    'bar spoon': 'barspoon', 'bar spoons': 'barspoon', 'barspoons': 'barspoon',
+    'splashes': 'splash', 'jiggers': 'jigger', 'shots': 'shot', 'cups': 'cup',
+}
+VOLUME_UNITS = set(['oz', 'ml', 'cl', 'dash', 'dashes', 'drop', 'drops', 'tsp', 'teaspoon', 'tbs', 'tablespoon',
+                    'part', 'parts', 'shot', 'jigger', 'pony', 'cup', 'barspoon', 'splash', 'pinch'])
+COUNTED_UNITS = set(['slice', 'slices', 'sprig', 'sprigs', 'wedge', 'wedges', 'leaf', 'leaves', 'cube', 'cubes',
+                     'peel', 'twist', 'twists', 'wheel', 'wheels', 'piece', 'pieces', 'strip', 'strips'])
+
+_NUMBER = r'\d+/\d+|\d*[½¼¾⅓⅔⅛]|\d+(?:[.,]\d+)?(?:\s+\d+/\d+|\s?[½¼¾⅓⅔⅛])?'
+_AMOUNT = rf'(?:{_NUMBER})(?:\s*[-–]\s*(?:{_NUMBER}))?' # '1-2 dashes' is a range
+_UNIT = r'fl\.?\s?oz|bar\s?spoons?|[a-z]+\.?'
+_MEASURED_LINE = re.compile(rf'^(?P<amount>{_AMOUNT})\s*(?:(?P<unit>{_UNIT})\s+)?(?:of\s+)?(?P<name>.+)$', re.IGNORECASE)
+_DESCRIPTIVE_LINE = re.compile(r'^(?P<amount>top(?:\s+up)?\s+with|fill(?:\s+up)?\s+with|a\s+splash\s+of|splash\s+of|'
+                               r'a\s+dash\s+of|dash\s+of|a\s+few\s+dashes\s+of|a\s+pinch\s+of|pinch\s+of)\s+(?P<name>.+)$',
+                               re.IGNORECASE)
+_TRAILING_DESCRIPTIVE = re.compile(r'^(?P<name>.+?),?\s+(?P<amount>to\s+top(?:\s+up)?|to\s+taste|to\s+fill)$', re.IGNORECASE)
+_NAME_NOISE = re.compile(r'\((?:[^()]*)\)|\bfreshly\s+squeezed\b|\bfresh(?:ly)?\b|\bchilled\b', re.IGNORECASE)
+
+_FRACTION_SLASH = re.compile(r'(\d)\s*[⁄/]\s*(\d)') # {{frac}} renders '1⁄2', or '1 ⁄ 2' once the spans are split
+
+def _parse_number(text):
+    text = text.strip().replace(',', '.')
+    total = 0.0
+    for part in text.split():
+        if '/' in part:
+            numerator, denominator = part.split('/')
+            total += float(numerator) / float(denominator)
+        elif part[-1] in UNICODE_FRACTIONS:
+            total += (float(part[:-1]) if part[:-1] else 0.0) + UNICODE_FRACTIONS[part[-1]]
+        else:
+            total += float(part)
+    return total
+
+def _parse_amount(text):
+    """A number, or the midpoint of a range like '1-2'."""
+    bounds = [_parse_number(bound) for bound in re.split(r'\s*[-–]\s*', text.strip())]
+    return sum(bounds) / len(bounds)
+
+def _clean_ingredient_name(name):
+    name = _NAME_NOISE.sub('', name)
+    name = re.sub(r',?\s*\b(?:for|to)\s+garnish\b.*$', '', name, flags=re.IGNORECASE)
+    return re.sub(r'\s+', ' ', name).strip(' ,.;:').lower()
+
+def parse_ingredient_line(line):
+    """
+    Parses one infobox ingredient line ('45 ml gin', '1½ oz (45 ml) lemon juice', '1 1⁄2 oz gin', '1-2 dashes
+    bitters', 'Top up with soda water') into {'amount', 'unit', 'name'} in the same shape the Gemini prompt asks for, or None if it has no
+    recognisable quantity.
+    """
+    line = re.sub(r'\s+', ' ', re.sub(r'\([^()]*\)', '', line)).strip() # '1½ oz (45 ml) gin' -> '1½ oz gin'
+    line = _FRACTION_SLASH.sub(r'\1/\2', line)
+    if not line:
+        return None
+
+    match = _MEASURED_LINE.match(line)
+    if match:
+        if re.match(r'[\d⁄/\-–]', match.group('name')):
+            return None # A quantity the patterns above don't cover; better left to the LLM than misread
+        amount = _parse_amount(match.group('amount'))
+        unit = (match.group('unit') or '').lower().rstrip('.')
+        unit = UNIT_ALIASES.get(unit, unit)
+        name = match.group('name')
+        if unit in VOLUME_UNITS:
+            pass
+        elif unit in COUNTED_UNITS:
+            unit = 'None'
+        else:
+            name = f"{match.group('unit')} {name}" if match.group('unit') else name
+            unit = 'None'
+        name = _clean_ingredient_name(name)
+        return {'amount': amount, 'unit': unit, 'name': name} if name else None
+
+    match = _DESCRIPTIVE_LINE.match(line) or _TRAILING_DESCRIPTIVE.match(line)
+    if match:
+        name = _clean_ingredient_name(match.group('name'))
+        amount = re.sub(r'^a\s+', '', match.group('amount').lower())
+        return {'amount': amount, 'unit': 'None', 'name': name} if name else None
+    return None
+
+def _infobox_field(infobox, keyword):
+    for label, value in infobox.items():
+        if keyword in label:
+            return value
+    return None
+
+class InfoboxExtractor:
+    """
+    Deterministic extractor for the common case: an article whose infobox lists measured ingredients and
+    a preparation. Returns None (a "hard page") when the infobox is missing, an ingredient line has no
+    recognisable quantity, or there is no preparation, so a tiered setup can pass the page to an LLM.
+    """
+    name = 'infobox'
+
+    def extract(self, details, page):
+        infobox = page.get('infobox') or {}
+        ingredient_lines = _infobox_field(infobox, 'ingredients')
+        preparation = _infobox_field(infobox, 'preparation')
+        if not ingredient_lines or not preparation:
+            return None
+        if isinstance(ingredient_lines, str):
+            ingredient_lines = [line for line in re.split(r'\s*[;\n]\s*', ingredient_lines) if line]
+
+        ingredients = []
+        for line in ingredient_lines:
+            ingredient = parse_ingredient_line(line)
+            if ingredient is None:
+                return None
+            ingredients.append(ingredient)
+
+        garnish = _infobox_field(infobox, 'garnish')
+        if isinstance(garnish, list):
+            garnish = ', '.join(garnish)
+        if garnish:
+            ingredients.append({'amount': 'None', 'unit': 'None', 'name': _clean_ingredient_name(garnish)})
+
+        if isinstance(preparation, list):
+            steps = preparation
+        else:
+            steps = [step for step in re.split(r'(?<=[.!?])\s+', preparation) if step]
+
+        for ingredient in ingredients:
+            ingredient['unit_ml'] = calculate_unit_ml(ingredient['amount'], ingredient['unit'], ingredient['name'])
+
+        lead = page.get('lead', '')
+        if len(lead) > MAX_DESCRIPTION_LENGTH:
+            lead = lead[:MAX_DESCRIPTION_LENGTH].rsplit(' ', 1)[0] + '...'
+        details['description'] = lead
+        details['ingredients'] = ingredients
+        details['preparation'] = steps
+        return details
+
+# --- LLM extractor ---
+class GeminiExtractor:
+    """Sends the article text to a Gemini model tier; max_concurrent bounds calls in flight across threads."""
+
+    def __init__(self, tier=DEFAULT_MODEL_TIER, max_concurrent=None):
+        if tier not in GEMINI_MODEL_TIERS:
+            raise ValueError(f"Unknown Gemini model tier {tier!r}; expected one of {sorted(GEMINI_MODEL_TIERS)}")
+        self.name = f"gemini-{tier}"
+        self.model_name = GEMINI_MODEL_TIERS[tier]
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+    def extract(self, details, page):
+        model = get_gemini_model(self.model_name)
+        if self._slots is None:
+            return extract_details_with_gemini(details, page['text'], model=model)
+        with self._slots:
+            return extract_details_with_gemini(details, page['text'], model=model)
+
+# --- Fallback chain ---
+class TieredExtractor:
+    """Tries each backend in order; the first that handles the page wins (cheap local parsing first)."""
+
+    def __init__(self, backends):
+        self.backends = list(backends)
+        self.name = '+'.join(backend.name for backend in self.backends)
+
+    def extract(self, details, page):
+        for backend in self.backends:
+            result = backend.extract(details, page)
+            if result is not None:
+                result['extraction_backend'] = backend.name
+                return result
+        details['notes'] = details.get('notes', []) + ["No extraction backend could handle this page."]
+        return details
+
+def build_extractor(backend=DEFAULT_EXTRACTION_BACKEND, tier=DEFAULT_MODEL_TIER, max_concurrent=None):
+    """
+    'local' parses infoboxes only, 'gemini' sends every page to the LLM, and 'tiered' parses locally and
+    only sends the pages the infobox can't answer to the LLM.
+    """
+    if backend not in BACKEND_CHOICES:
+        raise ValueError(f"Unknown extraction backend {backend!r}; expected one of {BACKEND_CHOICES}")
+    backends = []
+    if backend in ('tiered', 'local'):
+        backends.append(InfoboxExtractor())
+    if backend in ('tiered', 'gemini'):
+        backends.append(GeminiExtractor(tier, max_concurrent))
+    return TieredExtractor(backends)
@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+
+import requests
+
+# --- Configuration ---
+FAILURE_QUEUE_FILE = 'failure_queue.jsonl' # Append-only log; the last line for an item is its current state
+MAX_ATTEMPTS = 5 # Failures after which an item is given up on ('dead') instead of retried
+BASE_RETRY_DELAY = 30.0 # Seconds before the first retry; doubled after every further failure
+MAX_RETRY_DELAY = 900.0
+
+TRANSIENT = 'transient' # Worth retrying as is: timeouts, connection errors, 429 and 5xx responses
+PERMANENT = 'permanent' # Needs a fix first (4xx, unparseable page or response); only retried on request
+
+# --- Error classification ---
+def classify_status(status_code):
+    if status_code == 429 or status_code >= 500:
+        return TRANSIENT
+    return PERMANENT
+
+def classify_exception(exc):
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        return classify_status(exc.response.status_code)
+    if isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return TRANSIENT
+    return PERMANENT
+
+_TRANSIENT_NOTE_PREFIXES = ('Page fetch failed: ', 'Gemini API call failed: ')
+# Only a status right after the prefix counts: requests' HTTPError reads '503 Server Error: ...' and
+# Google's API errors '429 Resource has been exhausted ...', while connection errors and timeouts
+# carry other numbers ("HTTPSConnectionPool(host='en.wikipedia.org', port=443): Read timed out.").
+_LEADING_STATUS = re.compile(r'([1-5]\d\d)\b')
+
+def classify_note(note):
+    """Classifies a scraper 'notes' entry, e.g. 'Page fetch failed: 503 Server Error ...'."""
+    for prefix in _TRANSIENT_NOTE_PREFIXES:
+        if note.startswith(prefix):
+            status = _LEADING_STATUS.match(note, len(prefix))
+            return classify_status(int(status.group(1))) if status else TRANSIENT
+    return PERMANENT # Parse errors, pages without recipe content
+
+# --- The queue ---
+def _retry_delay(attempts):
+    return min(MAX_RETRY_DELAY, BASE_RETRY_DELAY * 2 ** (attempts - 1))
+
+class FailureQueue:
+    """
+    Persistent dead-letter queue of failed scrape and import items, keyed by (stage, key): the page URL
+    for 'scrape' and the lowercase recipe name for 'import'. Each item keeps what is needed to redo it
+    (the cocktail list entry or the recipe payload), its error classification, the attempt count and
+    when the next attempt is due. Safe to record into from several threads.
+    """
+
+    def __init__(self, path=FAILURE_QUEUE_FILE):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue # A line cut short by a crash
+                    self.entries[(entry['stage'], entry['key'])] = entry
+
+    def _append(self, entry):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    # --- Recording ---
+    def record(self, stage, key, error, kind, item=None, name=None, max_attempts=MAX_ATTEMPTS):
+        with self._lock:
+            previous = self.entries.get((stage, key))
+            attempts = previous['attempts'] + 1 if previous and previous['status'] != 'resolved' else 1
+            now = time.time()
+            entry = {
+                'stage': stage,
+                'key': key,
+                'name': name or (previous or {}).get('name') or key,
+                'kind': kind,
+                'error': str(error)[:500],
+                'attempts': attempts,
+                'status': 'dead' if attempts >= max_attempts else 'pending',
+                'failedAt': now,
+                'nextAttemptAt': now + _retry_delay(attempts),
+                'item': item if item is not None else (previous or {}).get('item'),
+            }
+            self.entries[(stage, key)] = entry
+            self._append(entry)
+        return entry
+
+    def resolve(self, stage, key):
+        """Marks a queued item as done; a no-op for items that never failed."""
+        with self._lock:
+            entry = self.entries.get((stage, key))
+            if entry is None or entry['status'] == 'resolved':
+                return
+            entry = dict(entry, status='resolved', resolvedAt=time.time())
+            self.entries[(stage, key)] = entry
+            self._append(entry)
+
+    # --- Queries ---
+    def pending(self, stage=None, include_permanent=False):
+        return [entry for entry in self.entries.values()
+                if entry['status'] == 'pending' and (stage is None or entry['stage'] == stage)
+                and (include_permanent or entry['kind'] == TRANSIENT)]
+
+    def due(self, stage=None, include_permanent=False, now=None):
+        now = time.time() if now is None else now
+        return [entry for entry in self.pending(stage, include_permanent) if entry['nextAttemptAt'] <= now]
+
+    def counts(self):
+        counts = {}
+        for entry in self.entries.values():
+            label = entry['status'] if entry['status'] != 'pending' else f"pending ({entry['kind']})"
+            counts[label] = counts.get(label, 0) + 1
+        return counts
+
+    def compact(self):
+        """Rewrites the log with one line per unresolved item."""
+        with self._lock:
+            self.entries = {k: e for k, e in self.entries.items() if e['status'] != 'resolved'}
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            os.replace(temp_path, self.path)
+
+# --- Retrying: only the queued items, with exponential backoff between attempts ---
+def _retry_scrape(entries, failures, extractor):
+    from corpus_store import load_cocktails
+    from scrape_cocktail_details import DETAILED_OUTPUT_JSON_FILE, HEADERS, scrape_cocktail_details
+    from wiki_revisions import fetch_revisions, title_from_url
+
+    cocktail_infos = [entry['item'] for entry in entries]
+    revisions = fetch_revisions([title_from_url(info['url']) for info in cocktail_infos], headers=HEADERS)
+    recovered = {}
+    for info in cocktail_infos:
+        print(f"Retrying scrape of '{info['name']}'...")
+        details = scrape_cocktail_details(info, extractor)
+        if details.get('notes'):
+            note = details['notes'][0]
+            failures.record('scrape', info['url'], note, classify_note(note), item=info, name=info['name'])
+            continue
+        details.update(revisions.get(title_from_url(info['url']), {}))
+        recovered[info['url']] = details
+
+    if recovered:
+        # Merged into the scraper's output so the next import (or incremental scrape) picks them up
+        try:
+            all_details = load_cocktails(DETAILED_OUTPUT_JSON_FILE)
+        except FileNotFoundError:
+            all_details = []
+        except ValueError as e:
+            raise RuntimeError(f"Could not read {DETAILED_OUTPUT_JSON_FILE} to merge recovered cocktails into: {e}")
+        for i, details in enumerate(all_details):
+            if details.get('url') in recovered:
+                all_details[i] = recovered[details['url']]
+        known_urls = set(details.get('url') for details in all_details)
+        all_details.extend(details for url, details in recovered.items() if url not in known_urls)
+        with open(DETAILED_OUTPUT_JSON_FILE, 'w', encoding='utf-8') as f:
+            json.dump(all_details, f, indent=4, ensure_ascii=False)
+        print(f"Recovered cocktails saved to {DETAILED_OUTPUT_JSON_FILE}")
+        for url in recovered:
+            failures.resolve('scrape', url)
+
+def _retry_import(entries, failures, existing_recipe_names):
+    import Import_Recipes as importer
+
+    for entry in entries:
+        if entry['key'] in existing_recipe_names:
+            # An earlier attempt reached the server after all (e.g. it timed out after saving)
+            print(f"'{entry['name']}' already exists on CocktailPi.")
+            failures.resolve('import', entry['key'])
+            continue
+        print(f"Retrying import of '{entry['name']}'...")
+        if importer.post_recipe_payload(entry['item'], failures=failures):
+            existing_recipe_names.add(entry['key'])
+
+def retry_failures(failures, stage=None, include_permanent=False, wait=True, extractor=None):
+    """
+    Retries the queued items of stage ('scrape', 'import' or both) whose backoff has elapsed. With
+    wait, sleeps until the next item is due and keeps going until every item is resolved or dead.
+    """
+    if include_permanent:
+        for entry in failures.pending(stage, include_permanent=True):
+            entry['nextAttemptAt'] = 0 # Retried right away once, as the cause was presumably fixed
+    existing_recipe_names = None
+
+    while True:
+        due = failures.due(stage, include_permanent)
+        if not due:
+            pending = failures.pending(stage, include_permanent)
+            if not pending or not wait:
+                break
+            delay = max(0.0, min(entry['nextAttemptAt'] for entry in pending) - time.time())
+            print(f"{len(pending)} failed items waiting; next retry in {delay:.0f}s.")
+            time.sleep(delay)
+            continue
+
+        scrape_entries = [entry for entry in due if entry['stage'] == 'scrape']
+        import_entries = [entry for entry in due if entry['stage'] == 'import']
+        if scrape_entries:
+            if extractor is None:
+                from extraction_backends import build_extractor
+                extractor = build_extractor()
+            try:
+                _retry_scrape(scrape_entries, failures, extractor)
+            except RuntimeError as e: # No Gemini API key, or an unreadable output file to merge into
+                print(f"Error: {e}")
+                break
+        if import_entries:
+            import Import_Recipes as importer
+            if existing_recipe_names is None:
+                if not importer.login():
+                    print("Could not log in to CocktailPi; import retries postponed.")
+                    break
+                existing_recipe_names = importer.fetch_existing_recipe_names()
+            _retry_import(import_entries, failures, existing_recipe_names)
+        include_permanent = False # Permanent failures get the one retry above, not a backoff series
+
+    failures.compact()
+    return failures.counts()
+
+def print_queue(failures):
+    if not failures.entries:
+        print("The failure queue is empty.")
+        return
+    for entry in sorted(failures.entries.values(), key=lambda e: (e['stage'], e['status'], e['name'])):
+        due = time.strftime('%H:%M:%S', time.localtime(entry['nextAttemptAt']))
+        print(f"{entry['stage']:7} {entry['status']:8} {entry['kind']:9} attempts {entry['attempts']} "
+              f"next {due}  {entry['name']}: {entry['error'][:100]}")
+    print(f"Totals: {failures.counts()}")
+
+# --- Main execution flow ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Inspect or retry failed scrape and import items.")
+    parser.add_argument('command', choices=('list', 'retry'))
+    parser.add_argument('--queue', default=FAILURE_QUEUE_FILE, help="Failure queue file")
+    parser.add_argument('--stage', choices=('scrape', 'import'), default=None, help="Only this stage (default: both)")
+    parser.add_argument('--include-permanent', action='store_true',
+                        help="Also retry permanent failures once (e.g. after fixing ingredient rules)")
+    parser.add_argument('--no-wait', action='store_true', help="Only retry items that are due now; don't wait for backoff")
+    args = parser.parse_args()
+
+    failures = FailureQueue(args.queue)
+    if args.command == 'list':
+        print_queue(failures)
+    else:
+        counts = retry_failures(failures, args.stage, args.include_permanent, wait=not args.no_wait)
+        print(f"\n--- Retry Summary ---")
+        print(f"Failure queue now: {counts or 'empty'}")
@@ -0,0 +1,103 @@
+import difflib
+import re
+from collections import defaultdict
+
+# rapidfuzz is optional (pip install rapidfuzz); without it scores come from difflib, which is slower
+# but ranks the same kind of matches the same way.
+try:
+    from rapidfuzz import fuzz
+except ImportError:
+    fuzz = None
+
+# --- Configuration ---
+DEFAULT_SCORE_THRESHOLD = 85 # 0-100; candidates scoring below this are never returned
+MAX_CANDIDATES = 12 # Only the names sharing the most trigrams with the query are scored
+MIN_NAME_LENGTH = 4 # Avoid matching very short, generic words (at least one side must be this long)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9à-ÿ']+")
+
+def tokenize(name):
+    return TOKEN_PATTERN.findall(name.lower())
+
+def trigrams(name):
+    grams = set()
+    for token in tokenize(name):
+        padded = f"  {token} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+def _difflib_ratio(a, b):
+    return difflib.SequenceMatcher(None, a, b).ratio() * 100
+
+def _token_set_ratio(a, b):
+    """
+    Pure-Python version of rapidfuzz's token_set_ratio: compares the shared tokens against each
+    side's leftovers, so 'kina lillet' vs 'lillet' scores 100 while 'gin' vs 'ginger ale' does not.
+    """
+    tokens_a, tokens_b = set(tokenize(a)), set(tokenize(b))
+    shared = ' '.join(sorted(tokens_a & tokens_b))
+    only_a = ' '.join(sorted(tokens_a - tokens_b))
+    only_b = ' '.join(sorted(tokens_b - tokens_a))
+    if shared and (not only_a or not only_b):
+        return 100.0
+
+    combined_a = f"{shared} {only_a}".strip()
+    combined_b = f"{shared} {only_b}".strip()
+    scores = [_difflib_ratio(combined_a, combined_b)]
+    if shared:
+        scores.append(_difflib_ratio(shared, combined_a))
+        scores.append(_difflib_ratio(shared, combined_b))
+    return max(scores)
+
+def _token_sort_ratio(a, b):
+    """Pure-Python version of rapidfuzz's token_sort_ratio: every token on either side counts."""
+    return _difflib_ratio(' '.join(sorted(tokenize(a))), ' '.join(sorted(tokenize(b))))
+
+def similarity(query, candidate):
+    """
+    Scores candidate as a name for query. Extra words on the query side are forgiven ('kina lillet'
+    is 'lillet'), extra words on the candidate side are not: 'water' is not 'soda water', and 'juice'
+    matches neither 'lime juice' nor 'orange juice'.
+    """
+    if set(tokenize(candidate)) <= set(tokenize(query)):
+        return fuzz.token_set_ratio(query, candidate) if fuzz is not None else _token_set_ratio(query, candidate)
+    return fuzz.token_sort_ratio(query, candidate) if fuzz is not None else _token_sort_ratio(query, candidate)
+
+class FuzzyIndex:
+    """
+    Approximate name matcher over a fixed set of names (e.g. CocktailPi ingredient names).
+    A trigram blocking index narrows every lookup down to a handful of candidates, which are then
+    scored; the best candidate at or above the threshold wins, independent of insertion order.
+    """
+
+    def __init__(self, names, score_threshold=DEFAULT_SCORE_THRESHOLD, max_candidates=MAX_CANDIDATES):
+        self.score_threshold = score_threshold
+        self.max_candidates = max_candidates
+        self._postings = defaultdict(set) # trigram -> names containing it
+        for name in names:
+            for gram in trigrams(name):
+                self._postings[gram].add(name)
+
+    def candidates(self, query):
+        overlap = defaultdict(int)
+        for gram in trigrams(query):
+            for name in self._postings.get(gram, ()):
+                overlap[name] += 1
+        ranked = sorted(overlap, key=lambda name: (-overlap[name], name))
+        return ranked[:self.max_candidates]
+
+    def best_match(self, query):
+        """Returns (name, score) for the best match of query, or (None, 0) if nothing clears the threshold."""
+        scored = []
+        for name in self.candidates(query):
+            if len(query) < MIN_NAME_LENGTH and len(name) < MIN_NAME_LENGTH:
+                continue
+            score = similarity(query, name)
+            if score >= self.score_threshold:
+                scored.append((score, name))
+        if not scored:
+            return None, 0
+        # Ties go to the name closest in length to the query, then alphabetically, so results are stable
+        score, name = min(scored, key=lambda item: (-item[0], abs(len(item[1]) - len(query)), item[1]))
+        return name, score
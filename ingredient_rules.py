@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import pickle
+from collections import defaultdict
+
+# --- Configuration ---
+INGREDIENT_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ingredient_rules.json')
+SUPPORTED_RULES_VERSIONS = (1,)
+MATCH_MODES = ('word_start', 'substring')
+COMPILER_VERSION = 2 # Bump when CompiledRules changes shape, so stale caches are ignored
+INDEX_KEY_LENGTH = 3 # Keywords are indexed by their first three characters
+
+def _cache_path(rules_path):
+    directory, filename = os.path.split(rules_path)
+    return os.path.join(directory, f".{filename}.cache.pickle")
+
+class CompiledRules:
+    """
+    Ingredient rules compiled from ingredient_rules.json.
+
+    Classification rules are ordered once by explicit precedence (priority, then keyword length, then
+    file order) and indexed by the first characters of their keyword, so matching a name only looks at
+    the rules that can start at each of its word starts instead of scanning every rule in dict order.
+    In 'word_start' mode a keyword must also end at a word end: 'gin' matches 'dry gin', not 'ginger beer'.
+    """
+
+    def __init__(self, spec):
+        self.version = spec['version']
+        self.match_mode = spec.get('match_mode', 'word_start')
+        if self.match_mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match_mode {self.match_mode!r}; expected one of {MATCH_MODES}")
+        default_priority = spec.get('default_priority', 100)
+
+        rules = []
+        for position, rule in enumerate(spec.get('classification_rules', [])):
+            keyword = rule['keyword'].lower().strip()
+            rules.append((-rule.get('priority', default_priority), -len(keyword), position, keyword, rule['target']))
+        rules.sort()
+        # (keyword, target, priority) in precedence order; a rule's index in this list is its rank
+        self.classification_rules = [(keyword, target, -neg_priority) for neg_priority, _, _, keyword, target in rules]
+
+        self._index = defaultdict(list) # keyword prefix -> [(rank, keyword, target)]
+        for rank, (keyword, target, _) in enumerate(self.classification_rules):
+            self._index[keyword[:INDEX_KEY_LENGTH]].append((rank, keyword, target))
+
+        self.implied_elements = frozenset(elem.lower().strip() for elem in spec.get('implied_elements', []))
+        self._implied_by_length = defaultdict(list)
+        for elem in self.implied_elements:
+            self._implied_by_length[len(elem)].append(elem)
+        self.generic_instruction_terms = frozenset(term.lower().strip() for term in spec.get('generic_instruction_terms', []))
+
+        self.warnings = find_rule_problems(self.classification_rules, self.match_mode)
+
+    # --- Matching ---
+    def _keyword_starts(self, name):
+        if self.match_mode == 'substring':
+            return range(len(name))
+        return [i for i in range(len(name)) if name[i].isalnum() and (i == 0 or not name[i - 1].isalnum())]
+
+    def _ends_word(self, name, end):
+        return self.match_mode == 'substring' or end == len(name) or not name[end].isalnum()
+
+    def classify(self, name):
+        """Returns [(keyword, target)] for every rule matching name, best first."""
+        matches = {} # rank -> (keyword, target); a keyword can occur more than once in name
+        for start in self._keyword_starts(name):
+            for key_length in range(1, INDEX_KEY_LENGTH + 1):
+                for rank, keyword, target in self._index.get(name[start:start + key_length], ()):
+                    if (len(keyword) == key_length or name.startswith(keyword, start)) and self._ends_word(name, start + len(keyword)):
+                        matches[rank] = (keyword, target)
+        return [matches[rank] for rank in sorted(matches)]
+
+    def is_implied(self, name):
+        """True for garnishes/manual elements: an exact implied element, or one that makes up all but 2 characters of name."""
+        if name in self.implied_elements:
+            return True
+        for length in range(max(1, len(name) - 2), len(name) + 1):
+            if any(elem in name for elem in self._implied_by_length.get(length, ())):
+                return True
+        return False
+
+# --- Rule checks: run once at compile time ---
+def _occurrences(keyword, text):
+    """Yields (starts at a word start, ends at a word end) for every occurrence of keyword in text."""
+    start = text.find(keyword)
+    while start != -1:
+        end = start + len(keyword)
+        yield start == 0 or not text[start - 1].isalnum(), end == len(text) or not text[end].isalnum()
+        start = text.find(keyword, start + 1)
+
+def _matches_as_words(keyword, text):
+    return any(starts and ends for starts, ends in _occurrences(keyword, text))
+
+def _matches_inside_word(keyword, text):
+    """True if keyword occurs in text as part of a longer word, like 'gin' in 'ginger ale'."""
+    return any(not (starts and ends) for starts, ends in _occurrences(keyword, text))
+
+def find_rule_problems(classification_rules, match_mode):
+    """
+    Reports duplicate/conflicting keywords and rules that can never win: a rule is shadowed when a rule
+    with higher precedence and a different target matches every name the rule itself matches. In
+    'substring' mode it also reports keywords that match inside a longer word of another rule's keyword
+    ('gin' in 'ginger ale'), as they claim every such name no longer rule covers ('ginger syrup').
+    """
+    problems = []
+    first_seen = {}
+    for rank, (keyword, target, _) in enumerate(classification_rules):
+        if keyword in first_seen:
+            other_target = classification_rules[first_seen[keyword]][1]
+            kind = 'Duplicate' if other_target == target else 'Conflicting'
+            problems.append(f"{kind} rule for keyword '{keyword}': '{other_target}' and '{target}'")
+            continue
+        first_seen[keyword] = rank
+        for earlier_keyword, earlier_target, _ in classification_rules[:rank]:
+            if earlier_target == target or earlier_keyword == keyword:
+                continue
+            covers = earlier_keyword in keyword if match_mode == 'substring' else _matches_as_words(earlier_keyword, keyword)
+            if covers:
+                problems.append(f"Rule '{keyword}' -> '{target}' is shadowed by '{earlier_keyword}' -> '{earlier_target}'")
+                break
+
+    if match_mode == 'substring':
+        for keyword, target, _ in classification_rules:
+            for other_keyword, other_target, _ in classification_rules:
+                if other_target != target and _matches_inside_word(keyword, other_keyword):
+                    problems.append(f"Keyword '{keyword}' -> '{target}' also matches inside the words of '{other_keyword}'; "
+                                    f"use match_mode 'word_start' to keep it to whole words")
+    return problems
+
+# --- Loading with an on-disk cache of the compiled form ---
+def compile_rules(spec):
+    if spec.get('version') not in SUPPORTED_RULES_VERSIONS:
+        raise ValueError(f"Unsupported ingredient rules version {spec.get('version')!r}")
+    return CompiledRules(spec)
+
+def load_rules(path=INGREDIENT_RULES_FILE, use_cache=True):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    fingerprint = (COMPILER_VERSION, hashlib.sha256(raw).hexdigest())
+    cache_path = _cache_path(path)
+
+    if use_cache:
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_fingerprint, compiled = pickle.load(f)
+            if cached_fingerprint == fingerprint:
+                return compiled
+        except (OSError, pickle.PickleError, EOFError, AttributeError, ValueError):
+            pass # Missing or unreadable cache: recompile below
+
+    compiled = compile_rules(json.loads(raw.decode('utf-8')))
+    for problem in compiled.warnings:
+        print(f"Warning: {os.path.basename(path)}: {problem}")
+
+    if use_cache:
+        try:
+            with open(cache_path, 'wb') as f:
+                pickle.dump((fingerprint, compiled), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print(f"Warning: Could not write compiled rules cache {cache_path}: {e}")
+    return compiled
+
+# --- Main execution: check a rules file ---
+if __name__ == '__main__':
+    import sys
+
+    rules_path = sys.argv[1] if len(sys.argv) > 1 else INGREDIENT_RULES_FILE
+    compiled = load_rules(rules_path, use_cache=False)
+    print(f"{len(compiled.classification_rules)} classification rules, {len(compiled.implied_elements)} implied elements, "
+          f"match mode '{compiled.match_mode}'.")
+    print(f"{len(compiled.warnings)} problem(s) found." if compiled.warnings else "No conflicting or shadowed rules found.")
@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+# --- Configuration ---
+DEFAULT_REPORT_INTERVAL = 15.0 # Seconds between progress lines
+DEFAULT_RATE_WINDOW = 60.0 # Rolling window (seconds) for items/s and the ETA
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.started = 0
+        self.done = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.busy_seconds = 0.0 # Summed duration of tracked items, to compare stages
+        self.recent = deque() # Completion timestamps inside the rate window
+
+    def rate(self, now, window):
+        while self.recent and now - self.recent[0] > window:
+            self.recent.popleft()
+        if not self.recent:
+            return 0.0
+        return len(self.recent) / min(window, max(now - self.recent[0], 1.0))
+
+    def error_rate(self):
+        return self.errors / self.done if self.done else 0.0
+
+class ProgressReporter:
+    """
+    Live progress for a long run. Each item moves through named stages (e.g. fetch -> extract, or
+    build -> post); stages report rolling items/s, in-flight counts and error rates. The main stage
+    is the one counted against total for the percentage and the ETA.
+
+    Use it as a context manager to print a progress line every interval seconds from a background
+    thread, and call write_summary() at the end for a machine-readable record of the run.
+    """
+
+    def __init__(self, total, main_stage, label='items', interval=DEFAULT_REPORT_INTERVAL, window=DEFAULT_RATE_WINDOW):
+        self.total = total
+        self.main_stage = main_stage
+        self.label = label
+        self.interval = interval
+        self.window = window
+        self.stages = {}
+        self.started_at = time.time()
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stage(main_stage) # Listed first in reports
+
+    def _stage(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageStats(name)
+        return stage
+
+    # --- Recording ---
+    def start(self, stage_name):
+        with self._lock:
+            stage = self._stage(stage_name)
+            stage.started += 1
+            stage.in_flight += 1
+
+    def finish(self, stage_name, ok=True, duration=None, started=True):
+        """Marks one item done in a stage; started=False for items that never went through start()."""
+        with self._lock:
+            stage = self._stage(stage_name)
+            if started:
+                stage.in_flight -= 1
+            else:
+                stage.started += 1
+            stage.done += 1
+            if not ok:
+                stage.errors += 1
+            if duration is not None:
+                stage.busy_seconds += duration
+            stage.recent.append(time.monotonic())
+
+    @contextmanager
+    def track(self, stage_name):
+        """
+        Times the block as one item of the stage. Yields a dict whose 'ok' the block can set to False
+        for failures reported without an exception; an exception counts as an error and is re-raised.
+        """
+        self.start(stage_name)
+        begin = time.monotonic()
+        item = {'ok': True}
+        try:
+            yield item
+        except BaseException:
+            item['ok'] = False
+            raise
+        finally:
+            self.finish(stage_name, ok=item['ok'], duration=time.monotonic() - begin)
+
+    # --- Reporting ---
+    def eta_seconds(self):
+        with self._lock:
+            main = self.stages[self.main_stage]
+            rate = main.rate(time.monotonic(), self.window)
+            remaining = (self.total or 0) - main.done
+        if not self.total or rate <= 0:
+            return None
+        return max(remaining, 0) / rate
+
+    def format_line(self):
+        eta = self.eta_seconds()
+        now = time.monotonic()
+        with self._lock:
+            main = self.stages[self.main_stage]
+            parts = []
+            if self.total:
+                parts.append(f"{main.done}/{self.total} {self.label} ({100.0 * main.done / self.total:.0f}%)")
+            else:
+                parts.append(f"{main.done} {self.label}")
+            parts.append(f"{main.rate(now, self.window):.2f}/s")
+            parts.append(f"ETA {_format_duration(eta)}" if eta is not None else "ETA n/a")
+            for stage in self.stages.values():
+                if stage.name == self.main_stage:
+                    continue
+                parts.append(f"{stage.name} {stage.rate(now, self.window):.2f}/s, {stage.in_flight} in flight, "
+                             f"{100.0 * stage.error_rate():.0f}% err")
+        return f"[progress] {_format_duration(now - self._start)} elapsed | " + ' | '.join(parts)
+
+    def report(self):
+        print(self.format_line(), flush=True)
+
+    def _report_periodically(self):
+        while not self._stop.wait(self.interval):
+            self.report()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._report_periodically, name='progress', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.report()
+        return False
+
+    # --- Run summary ---
+    def summary(self):
+        elapsed = time.monotonic() - self._start
+        with self._lock:
+            stages = {}
+            for stage in self.stages.values():
+                stages[stage.name] = {
+                    'done': stage.done,
+                    'errors': stage.errors,
+                    'errorRate': round(stage.error_rate(), 4),
+                    'itemsPerSecond': round(stage.done / elapsed, 4) if elapsed > 0 else 0.0,
+                    'averageSeconds': round(stage.busy_seconds / stage.done, 4) if stage.done and stage.busy_seconds else None,
+                    'unfinished': stage.in_flight,
+                }
+        return {
+            'label': self.label,
+            'total': self.total,
+            'startedAt': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'finishedAt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'elapsedSeconds': round(elapsed, 3),
+            'mainStage': self.main_stage,
+            'stages': stages,
+        }
+
+    def write_summary(self, path, extra=None):
+        summary = self.summary()
+        if extra:
+            summary.update(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"Run summary saved to {path}")
+        return summary
+
+def track(reporter, stage_name):
+    """reporter.track(stage_name), or a no-op when the caller didn't ask for progress reporting."""
+    return reporter.track(stage_name) if reporter is not None else nullcontext({'ok': True})
+
+def _format_duration(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
@@ -0,0 +1,143 @@
+import re
+from bisect import bisect_left
+
+# --- Glass by total volume ---
+# Upper bound of the drink's total liquid volume (ml) -> CocktailPi glass names to try, in order.
+# The last band has no upper bound.
+GLASS_VOLUME_BANDS = [
+    (60, ['shot glass']),
+    (130, ['cocktail glass', 'coupe', 'martini glass', 'nick and nora glass']),
+    (170, ['old fashioned glass', 'rocks glass', 'lowball glass']),
+    (None, ['highball glass', 'collins glass', 'hurricane glass']),
+]
+
+# --- Category by ingredient/spirit profile ---
+# Checked in order; the first profile that applies and has a matching CocktailPi category wins.
+CATEGORY_PROFILE_RULES = [
+    ('non_alcoholic', ['non-alcoholic', 'alcohol-free', 'mocktail', 'mocktails']),
+    ('shot', ['shots', 'shot', 'shooter', 'shooters']),
+    ('sour', ['sour', 'sours']),
+    ('long', ['longdrink', 'longdrinks', 'long drink', 'long drinks', 'highball', 'highballs']),
+]
+SHOT_MAX_ML = 60
+SOUR_MAX_ML = 220
+LONG_DRINK_MIN_ML = 170
+PARTS_UNITS = ('part', 'parts') # Proportions, not volumes: such recipes have no usable total
+
+# Keywords are matched as whole words in lowercase scraped ingredient names
+ALCOHOL_KEYWORDS = [
+    'vodka', 'gin', 'rum', 'tequila', 'mezcal', 'whiskey', 'whisky', 'bourbon', 'rye', 'scotch', 'brandy',
+    'cognac', 'pisco', 'cachaça', 'cachaca', 'liqueur', 'vermouth', 'amaro', 'fernet', 'schnapps', 'absinthe',
+    'wine', 'champagne', 'prosecco', 'cava', 'sherry', 'port', 'beer', 'cider', 'sake', 'campari', 'aperol',
+    'cointreau', 'triple sec', 'curaçao', 'curacao', 'grand marnier', 'amaretto', 'lillet', 'chartreuse',
+    'kahlua', 'kahlúa', 'baileys', 'drambuie', 'frangelico', 'creme de', 'crème de', 'maraschino liqueur', 'falernum liqueur'
+]
+CITRUS_KEYWORDS = ['lemon juice', 'lime juice', 'grapefruit juice', 'yuzu', 'sour mix']
+SWEETENER_KEYWORDS = ['syrup', 'grenadine', 'orgeat', 'honey', 'agave', 'sugar', 'falernum', 'cordial']
+MIXER_KEYWORDS = ['soda', 'tonic', 'cola', 'ginger ale', 'ginger beer', 'lemonade', 'sprite', 'lemon-lime',
+                  'juice', 'milk', 'cream']
+
+ALCOHOL, CITRUS, SWEETENER, MIXER = 1, 2, 4, 8
+
+def _keyword_pattern(keywords):
+    return re.compile(r'(?<!\w)(?:' + '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + r')(?!\w)')
+
+_FLAG_PATTERNS = [
+    (ALCOHOL, _keyword_pattern(ALCOHOL_KEYWORDS)),
+    (CITRUS, _keyword_pattern(CITRUS_KEYWORDS)),
+    (SWEETENER, _keyword_pattern(SWEETENER_KEYWORDS)),
+    (MIXER, _keyword_pattern(MIXER_KEYWORDS)),
+]
+
+class InferenceTables:
+    """
+    Lookup tables resolved once against the server's glass and category maps: volume band bounds with
+    their glass IDs, profile -> category ID, and a per-ingredient-name flag cache that fills as the
+    dataset is scanned. After that, assigning a recipe is a bisect plus a few bit tests.
+    """
+
+    def __init__(self, glass_map, category_map, default_glass_id, default_category_id):
+        self.default_glass_id = default_glass_id
+        self.default_category_id = default_category_id
+
+        self.volume_bounds = []
+        self.band_glass_ids = []
+        for upper_bound, glass_names in GLASS_VOLUME_BANDS:
+            glass_id = next((glass_map[name] for name in glass_names if name in glass_map), default_glass_id)
+            if upper_bound is not None:
+                self.volume_bounds.append(upper_bound)
+            self.band_glass_ids.append(glass_id)
+
+        self.profile_category_ids = {}
+        for profile, category_names in CATEGORY_PROFILE_RULES:
+            category_id = next((category_map[name] for name in category_names if name in category_map), None)
+            if category_id is not None:
+                self.profile_category_ids[profile] = category_id
+
+        self.ingredient_flags = {} # lowercase ingredient name -> ALCOHOL | CITRUS | ...
+
+    def flags_for(self, ingredient_name):
+        name = ingredient_name.lower().strip()
+        flags = self.ingredient_flags.get(name)
+        if flags is None:
+            flags = 0
+            for flag, pattern in _FLAG_PATTERNS:
+                if pattern.search(name):
+                    flags |= flag
+            if flags & CITRUS:
+                flags &= ~MIXER # 'lime juice' sours a drink; it doesn't lengthen it
+            self.ingredient_flags[name] = flags
+        return flags
+
+def infer_glass_and_category(tables, scraped_recipe):
+    """
+    Returns (glass_id, category_id) for one scraped recipe. The total volume only counts when every
+    liquid is measured in real units: 'top with tonic' or parts notation would make any drink look
+    like a shot, so such recipes get the default glass and a profile judged by ingredients alone.
+    """
+    total_ml = 0.0
+    flags = 0
+    measured = True
+    for ing in scraped_recipe.get('ingredients', []):
+        unit_ml = ing.get('unit_ml')
+        ing_flags = tables.flags_for(ing.get('name', ''))
+        if unit_ml is not None and unit_ml > 0:
+            total_ml += unit_ml
+        elif ing_flags:
+            measured = False # A liquid without a volume, like 'top with soda water'
+        if str(ing.get('unit', '')).lower().strip() in PARTS_UNITS:
+            measured = False
+        flags |= ing_flags
+
+    if measured and total_ml > 0:
+        glass_id = tables.band_glass_ids[bisect_left(tables.volume_bounds, total_ml)]
+    else:
+        glass_id = tables.default_glass_id
+
+    if not scraped_recipe.get('ingredients'):
+        profile = None # Nothing to judge by
+    elif not flags & ALCOHOL:
+        profile = 'non_alcoholic'
+    elif not measured:
+        # No usable volume: a sour without a lengthener, or a long drink with one
+        if flags & CITRUS and flags & SWEETENER and not flags & MIXER:
+            profile = 'sour'
+        elif flags & MIXER:
+            profile = 'long'
+        else:
+            profile = None
+    elif 0 < total_ml <= SHOT_MAX_ML:
+        profile = 'shot'
+    elif flags & CITRUS and flags & SWEETENER and total_ml <= SOUR_MAX_ML:
+        profile = 'sour'
+    elif flags & MIXER and total_ml >= LONG_DRINK_MIN_ML:
+        profile = 'long'
+    else:
+        profile = None
+    category_id = tables.profile_category_ids.get(profile, tables.default_category_id)
+
+    return glass_id, category_id
+
+def infer_for_dataset(tables, scraped_recipes):
+    """Assigns glass and category to every recipe in one pass; returns a list of (glass_id, category_id)."""
+    return [infer_glass_and_category(tables, recipe) for recipe in scraped_recipes]
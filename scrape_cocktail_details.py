@@ -1,31 +1,52 @@
+import argparse
 import requests
 from bs4 import BeautifulSoup
+import threading
 import time
 import json
 import re
-from dotenv import load_dotenv
 import os
 
-# Import the Google Generative AI library
-import google.generativeai as genai
+from corpus_store import load_cocktails, save_cocktails
+from failure_queue import FAILURE_QUEUE_FILE, FailureQueue, classify_note
+from progress import ProgressReporter, track
+from wiki_revisions import fetch_revisions, plan_incremental_scrape, title_from_url
 
 # --- Configuration ---
 COCKTAIL_LIST_FILE = 'cocktail_list.json'
 DETAILED_OUTPUT_JSON_FILE = 'cocktails_with_details_gemini.json' # New output file name
+DETAILED_OUTPUT_DB_FILE = None # Set to e.g. 'cocktails.db' to also save the compact SQLite store (see corpus_store.py)
+INCREMENTAL_SCRAPE = True # Only re-scrape pages whose Wikipedia revision changed since the last saved output
+CONCURRENT_SCRAPE_WORKERS = 0 # 0 = one page at a time; >0 = I/O threads for scrape_pipeline.py (extraction uses all cores)
+SCRAPE_RUN_SUMMARY_FILE = 'scrape_run_summary.json' # Machine-readable record of the last run (rates, error counts)
+TEST_LIMIT = 20 # Cocktails processed per run unless --all is given
+GEMINI_MODEL_NAME = 'models/gemini-1.5-pro-latest'
+
+# --- Gemini client, set up on first use ---
+# Importing this module must stay cheap: the unit conversion and HTML extraction functions are used by
+# other tools and by the extraction worker processes, none of which need an API key.
+_gemini_models = {} # model name -> GenerativeModel
+_gemini_model_lock = threading.Lock()
+
+def get_gemini_model(model_name=GEMINI_MODEL_NAME):
+    """
+    Returns the shared Gemini model, loading GEMINI_API_KEY from .env and configuring the client the
+    first time. Raises RuntimeError when no key is set.
+    """
+    if model_name not in _gemini_models:
+        with _gemini_model_lock:
+            if model_name not in _gemini_models:
+                from dotenv import load_dotenv
 
-# --- Load environment variables ---
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-if not GEMINI_API_KEY:
-    print("Error: GEMINI_API_KEY not found in .env file. Please create a .env file and add your key.")
-    exit()
-
-# Configure the Google Generative AI client
-genai.configure(api_key=GEMINI_API_KEY)
+                load_dotenv()
+                gemini_api_key = os.getenv("GEMINI_API_KEY")
+                if not gemini_api_key:
+                    raise RuntimeError("GEMINI_API_KEY not found in .env file. Please create a .env file and add your key.")
 
-# Initialize the Gemini model
-model = genai.GenerativeModel('models/gemini-1.5-pro-latest')
+                import google.generativeai as genai
+                genai.configure(api_key=gemini_api_key)
+                _gemini_models[model_name] = genai.GenerativeModel(model_name)
+    return _gemini_models[model_name]
 
 # --- Unit Conversion Data ---
 UNIT_TO_ML = {
@@ -239,36 +260,77 @@ def extract_content_for_gemini(soup, section_id=None):
     return full_text
 
 
-def scrape_cocktail_details(cocktail_info):
+def fetch_cocktail_page(url):
     """
-    Fetches details for a single cocktail and uses Gemini for extraction.
+    Downloads the raw HTML of a cocktail article. Raises requests.exceptions.RequestException on failure.
     """
-    url = cocktail_info['url']
-    name = cocktail_info['name']
-    print(f"  Scraping details for '{name}' from {url}...")
-    
-    details = {
-        'name': name,
-        'url': url,
+    response = requests.get(url, headers=HEADERS, timeout=15)
+    response.raise_for_status()
+    return response.text
+
+
+def extract_text_from_html(html, section_id=None):
+    """
+    Parses the HTML and extracts the text for Gemini. This is the CPU-bound part of scraping
+    (BeautifulSoup parsing, find_all passes, regex cleanup), kept as a plain top-level function
+    so it can run in a worker process.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    return extract_content_for_gemini(soup, section_id)
+
+
+def new_cocktail_details(cocktail_info):
+    return {
+        'name': cocktail_info['name'],
+        'url': cocktail_info['url'],
         'description': '',
         'ingredients': [],
         'preparation': []
     }
 
+
+def scrape_cocktail_details(cocktail_info, extractor=None, reporter=None):
+    """
+    Fetches details for a single cocktail and extracts them with the given backend (see
+    extraction_backends.py), or with Gemini directly when no extractor is given. The 'fetch' and
+    'extract' stages are recorded on reporter (a progress.ProgressReporter) if one is given.
+    """
+    url = cocktail_info['url']
+    name = cocktail_info['name']
+    print(f"  Scraping details for '{name}' from {url}...")
+    
+    details = new_cocktail_details(cocktail_info)
+
     try:
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        response.raise_for_status()
+        with track(reporter, 'fetch'):
+            html = fetch_cocktail_page(url)
     except requests.exceptions.RequestException as e:
         print(f"  Error fetching {url}: {e}")
+        details['notes'] = details.get('notes', []) + [f"Page fetch failed: {e}"]
         return details
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-
     # Determine if there's a section ID in the URL
     section_id = url.split('#')[-1] if '#' in url else None
 
-    # Extract relevant plain text content for Gemini
-    article_text_for_gemini = extract_content_for_gemini(soup, section_id)
+    with track(reporter, 'extract') as item:
+        if extractor is not None:
+            from extraction_backends import extract_page
+            details = extractor.extract(details, extract_page(html, section_id))
+        else:
+            # Extract relevant plain text content for Gemini
+            article_text_for_gemini = extract_text_from_html(html, section_id)
+            details = extract_details_with_gemini(details, article_text_for_gemini)
+        item['ok'] = not details.get('notes')
+
+    return details
+
+
+def extract_details_with_gemini(details, article_text_for_gemini, model=None):
+    """
+    Sends the extracted article text to Gemini (the default model unless one is given) and fills
+    details with the parsed result.
+    """
+    name = details['name']
 
     if not article_text_for_gemini.strip():
         print(f"  Warning: No relevant content found for {name} to send to Gemini.")
@@ -279,7 +341,7 @@ def scrape_cocktail_details(cocktail_info):
     try:
         prompt = GEMINI_PROMPT_TEMPLATE.format(article_text=article_text_for_gemini)
         
-        gemini_response = model.generate_content(prompt)
+        gemini_response = (model or get_gemini_model()).generate_content(prompt)
         
         # Attempt to parse the JSON response
         response_text = gemini_response.text.strip()
@@ -348,7 +410,33 @@ def scrape_cocktail_details(cocktail_info):
     return details
 
 # --- Main execution ---
-if __name__ == "__main__":
+def main():
+    from extraction_backends import BACKEND_CHOICES, DEFAULT_EXTRACTION_BACKEND, DEFAULT_MODEL_TIER, GEMINI_MODEL_TIERS, build_extractor
+
+    parser = argparse.ArgumentParser(description="Scrape cocktail details from Wikipedia and extract them with Gemini.")
+    parser.add_argument('--limit', type=int, default=TEST_LIMIT, help="Only process the first N cocktails of the list")
+    parser.add_argument('--all', action='store_true', help="Process the whole cocktail list")
+    parser.add_argument('--workers', type=int, default=CONCURRENT_SCRAPE_WORKERS,
+                        help="0 = one page at a time; >0 = I/O threads for concurrent scraping")
+    parser.add_argument('--full', action='store_true', help="Re-scrape every page, even if its revision is unchanged")
+    parser.add_argument('--db', default=DETAILED_OUTPUT_DB_FILE, help="Also save the compact SQLite store to this path")
+    parser.add_argument('--backend', choices=BACKEND_CHOICES, default=DEFAULT_EXTRACTION_BACKEND,
+                        help="tiered = infobox parsing first, Gemini only for pages it can't handle")
+    parser.add_argument('--model-tier', choices=sorted(GEMINI_MODEL_TIERS), default=DEFAULT_MODEL_TIER, help="Gemini model tier")
+    parser.add_argument('--summary', default=SCRAPE_RUN_SUMMARY_FILE, help="Where to write the machine-readable run summary")
+    parser.add_argument('--failure-queue', default=FAILURE_QUEUE_FILE,
+                        help="Failed pages are queued here; retry them with 'python failure_queue.py retry'")
+    args = parser.parse_args()
+
+    from scrape_pipeline import DEFAULT_GEMINI_CONCURRENCY, scrape_concurrently
+    extractor = build_extractor(args.backend, args.model_tier, max_concurrent=DEFAULT_GEMINI_CONCURRENCY)
+    if args.backend != 'local':
+        try:
+            get_gemini_model(GEMINI_MODEL_TIERS[args.model_tier])
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            exit()
+
     try:
         with open(COCKTAIL_LIST_FILE, 'r', encoding='utf-8') as f:
             cocktail_list = json.load(f)
@@ -356,23 +444,73 @@ if __name__ == "__main__":
         print(f"Error: {COCKTAIL_LIST_FILE} not found. Run scrape_cocktails.py first.")
         exit()
 
-    all_cocktail_details = []
-    
     # Process all cocktails or a test limit
-    test_limit = 20 # Process first 20 for initial test with Gemini
-    cocktails_to_process = cocktail_list[:test_limit]
+    cocktails_to_process = cocktail_list if args.all else cocktail_list[:args.limit]
 
-    # For full run: uncomment the line below and comment out the test_limit lines
-    # cocktails_to_process = cocktail_list
-
-    for i, cocktail_info in enumerate(cocktails_to_process):
-        print(f"Processing {i+1}/{len(cocktails_to_process)}: {cocktail_info['name']}")
-        details = scrape_cocktail_details(cocktail_info)
-        all_cocktail_details.append(details)
-        time.sleep(1.5) # Increased delay to be polite to Gemini API and avoid rate limits
+    # --- Work out which pages changed since the last run (one bulk revision query per 50 pages) ---
+    previous_details = []
+    if INCREMENTAL_SCRAPE and not args.full and os.path.exists(DETAILED_OUTPUT_JSON_FILE):
+        try:
+            previous_details = load_cocktails(DETAILED_OUTPUT_JSON_FILE)
+        except ValueError as e:
+            print(f"Warning: Could not read previous output {DETAILED_OUTPUT_JSON_FILE} ({e}). Scraping everything.")
+
+    print("Checking Wikipedia revision IDs...")
+    revisions = fetch_revisions([title_from_url(c['url']) for c in cocktails_to_process], headers=HEADERS)
+    to_scrape, reused = plan_incremental_scrape(cocktails_to_process, previous_details, revisions)
+    print(f"{len(reused)} cocktails unchanged since last scrape, {len(to_scrape)} to (re-)scrape.")
+
+    all_cocktail_details = [None] * len(cocktails_to_process)
+    for index, details in reused.items():
+        all_cocktail_details[index] = details
+
+    reporter = ProgressReporter(len(to_scrape), 'cocktails', label='cocktails')
+    with reporter:
+        if args.workers:
+            scraped_details = scrape_concurrently([cocktail_info for _, cocktail_info in to_scrape],
+                                                  fetch_workers=args.workers, extractor=extractor, reporter=reporter)
+        else:
+            scraped_details = []
+            for i, (index, cocktail_info) in enumerate(to_scrape):
+                print(f"Processing {i+1}/{len(to_scrape)}: {cocktail_info['name']}")
+                details = scrape_cocktail_details(cocktail_info, extractor, reporter)
+                reporter.finish('cocktails', ok=not details.get('notes'), started=False)
+                scraped_details.append(details)
+                if details.get('extraction_backend') != 'infobox':
+                    time.sleep(1.5) # Increased delay to be polite to Gemini API and avoid rate limits
+
+    failures = FailureQueue(args.failure_queue)
+    for (index, cocktail_info), details in zip(to_scrape, scraped_details):
+        latest = revisions.get(title_from_url(cocktail_info['url']))
+        if latest:
+            details.update(latest) # Recorded so the next run can skip this page if it hasn't changed
+        all_cocktail_details[index] = details
+        if details.get('notes'):
+            note = details['notes'][0]
+            failures.record('scrape', cocktail_info['url'], note, classify_note(note), item=cocktail_info, name=cocktail_info['name'])
+        else:
+            failures.resolve('scrape', cocktail_info['url'])
 
     print(f"\nScraping complete for {len(all_cocktail_details)} cocktails.")
 
     with open(DETAILED_OUTPUT_JSON_FILE, 'w', encoding='utf-8') as f:
         json.dump(all_cocktail_details, f, indent=4, ensure_ascii=False)
     print(f"Detailed cocktail data saved to {DETAILED_OUTPUT_JSON_FILE}")
+
+    if args.db:
+        save_cocktails(all_cocktail_details, args.db)
+
+    backend_counts = {}
+    for details in scraped_details:
+        backend = details.get('extraction_backend', 'none')
+        backend_counts[backend] = backend_counts.get(backend, 0) + 1
+    reporter.write_summary(args.summary, extra={
+        'backend': args.backend,
+        'modelTier': args.model_tier,
+        'reusedUnchanged': len(reused),
+        'extractionBackends': backend_counts,
+        'failed': [details['name'] for details in scraped_details if details.get('notes')],
+    })
+
+if __name__ == "__main__":
+    main()
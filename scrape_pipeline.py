@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+
+from extraction_backends import build_extractor, extract_page
+from progress import track
+from scrape_cocktail_details import fetch_cocktail_page, new_cocktail_details
+
+# --- Configuration ---
+DEFAULT_FETCH_WORKERS = 8 # Threads doing network I/O (page downloads and Gemini calls)
+DEFAULT_GEMINI_CONCURRENCY = 2 # Gemini calls in flight at once; keep low to stay under API rate limits
+DEFAULT_FETCHES_PER_HOST = 2 # Page downloads in flight per host, however many I/O threads there are
+MIN_FETCH_INTERVAL = 0.5 # Seconds between the starts of two downloads from the same host
+
+# --- Politeness: however many threads there are, each host only sees a trickle of requests ---
+class HostFetchLimiter:
+    """
+    Caps the downloads in flight per host at per_host and spaces their starts at least min_interval
+    apart, so a wide I/O pool (sized for Gemini calls and parsing) doesn't hammer Wikipedia.
+    """
+
+    def __init__(self, per_host=DEFAULT_FETCHES_PER_HOST, min_interval=MIN_FETCH_INTERVAL):
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._slots = {} # host -> BoundedSemaphore(per_host)
+        self._next_start = {} # host -> earliest monotonic time the next download may start
+
+    @contextmanager
+    def slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            slots = self._slots.get(host)
+            if slots is None:
+                slots = self._slots[host] = threading.BoundedSemaphore(self.per_host)
+        with slots:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.min_interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+# --- Concurrent scraping: threads for network I/O, processes for HTML-to-text extraction ---
+# BeautifulSoup parsing and the regex cleanup hold the GIL, so with threads alone the whole scrape is
+# limited to one core. Each cocktail runs on an I/O thread, which hands its HTML to a process pool
+# sized to the core count and waits (without holding the GIL) for the extracted page, then runs the
+# extractor on it (infobox parsing, or a Gemini call limited to gemini_concurrency in flight).
+
+def _scrape_one(cocktail_info, extraction_pool, extractor, reporter, fetch_limiter):
+    url = cocktail_info['url']
+    name = cocktail_info['name']
+    print(f"  Scraping details for '{name}' from {url}...")
+
+    details = new_cocktail_details(cocktail_info)
+
+    try:
+        with fetch_limiter.slot(url), track(reporter, 'fetch'):
+            html = fetch_cocktail_page(url)
+    except requests.exceptions.RequestException as e:
+        print(f"  Error fetching {url}: {e}")
+        details['notes'] = details.get('notes', []) + [f"Page fetch failed: {e}"]
+        return details
+
+    section_id = url.split('#')[-1] if '#' in url else None
+    try:
+        with track(reporter, 'parse'):
+            page = extraction_pool.submit(extract_page, html, section_id).result()
+    except Exception as e:
+        print(f"  Error extracting text for {name}: {e}")
+        details['notes'] = details.get('notes', []) + [f"Text extraction failed: {e}"]
+        return details
+
+    with track(reporter, 'extract') as item:
+        details = extractor.extract(details, page)
+        item['ok'] = not details.get('notes')
+    return details
+
+def iter_scrape_concurrently(cocktail_infos, fetch_workers=DEFAULT_FETCH_WORKERS, extract_workers=None,
+                             gemini_concurrency=DEFAULT_GEMINI_CONCURRENCY, extractor=None, reporter=None,
+                             fetches_per_host=DEFAULT_FETCHES_PER_HOST):
+    """
+    Scrapes the cocktails concurrently and yields (cocktail_info, details) pairs as they finish.
+    At most 2 * fetch_workers cocktails are in flight; if the caller stops pulling results, no new
+    pages are started, so a slow consumer applies backpressure all the way to the fetches. Of those,
+    only fetches_per_host download from any one host at a time (see HostFetchLimiter).
+    extractor defaults to the tiered infobox-then-Gemini backend (see extraction_backends.py).
+    The fetch, parse and extract stages are recorded on reporter (a progress.ProgressReporter) if given.
+    """
+    extract_workers = extract_workers or os.cpu_count() or 1
+    max_in_flight = 2 * fetch_workers
+    if extractor is None:
+        extractor = build_extractor(max_concurrent=gemini_concurrency)
+    fetch_limiter = HostFetchLimiter(fetches_per_host)
+    print(f"Scraping {len(cocktail_infos)} cocktails with {fetch_workers} I/O threads, "
+          f"{extract_workers} extraction processes and the '{extractor.name}' extractor.")
+
+    with ProcessPoolExecutor(max_workers=extract_workers) as extraction_pool, \
+         ThreadPoolExecutor(max_workers=fetch_workers) as io_pool:
+        pending = {}
+        remaining = iter(cocktail_infos)
+        while True:
+            for cocktail_info in remaining:
+                pending[io_pool.submit(_scrape_one, cocktail_info, extraction_pool, extractor, reporter,
+                                       fetch_limiter)] = cocktail_info
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+def scrape_concurrently(cocktail_infos, fetch_workers=DEFAULT_FETCH_WORKERS, extract_workers=None,
+                        gemini_concurrency=DEFAULT_GEMINI_CONCURRENCY, extractor=None, reporter=None,
+                        fetches_per_host=DEFAULT_FETCHES_PER_HOST):
+    """
+    Scrapes every cocktail in cocktail_infos and returns their details in the same order.
+    extract_workers defaults to the number of CPU cores. Finished cocktails are counted in reporter's
+    'cocktails' stage.
+    """
+    results = {}
+    for cocktail_info, details in iter_scrape_concurrently(cocktail_infos, fetch_workers, extract_workers,
+                                                           gemini_concurrency, extractor, reporter, fetches_per_host):
+        results[id(cocktail_info)] = details
+        if reporter is not None:
+            reporter.finish('cocktails', ok=not details.get('notes'), started=False)
+    return [results[id(cocktail_info)] for cocktail_info in cocktail_infos]
@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import Import_Recipes as importer
+from adaptive_concurrency import AIMDController
+from extraction_backends import BACKEND_CHOICES, DEFAULT_EXTRACTION_BACKEND, DEFAULT_MODEL_TIER, GEMINI_MODEL_TIERS, build_extractor
+from failure_queue import FAILURE_QUEUE_FILE, FailureQueue
+from progress import ProgressReporter, track
+from recipe_inference import InferenceTables, infer_glass_and_category
+from scrape_cocktail_details import COCKTAIL_LIST_FILE, get_gemini_model
+from scrape_pipeline import DEFAULT_FETCH_WORKERS, DEFAULT_GEMINI_CONCURRENCY, iter_scrape_concurrently
+
+# --- Configuration ---
+STREAM_QUEUE_SIZE = 16 # Scraped cocktails waiting for import; a full queue pauses the scraper
+STREAM_CHECKPOINT_FILE = 'stream_import_checkpoint.jsonl' # One line per finished cocktail, for restarts
+STREAM_RUN_SUMMARY_FILE = 'stream_import_run_summary.json' # Machine-readable record of the last run
+STREAM_POLL_INTERVAL = 0.5 # Seconds between checks for finished POSTs while waiting on a slow scraper
+
+# Outcomes that are final; anything else ('failed') is retried when the stream is restarted
+FINAL_OUTCOMES = ('imported', 'duplicate', 'skipped')
+
+_STREAM_DONE = object() # Sentinel telling the importer that the scraper has finished
+
+# --- Checkpoint: append-only, so a crash loses at most the cocktail being imported ---
+def load_checkpoint(path):
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue # A line cut short by a crash; that cocktail is simply redone
+            if entry.get('outcome') in FINAL_OUTCOMES:
+                finished.add((entry['name'], entry['url']))
+            else:
+                finished.discard((entry['name'], entry['url']))
+    return finished
+
+def append_checkpoint(checkpoint_file, cocktail_info, outcome, details):
+    entry = {'name': cocktail_info['name'], 'url': cocktail_info['url'], 'outcome': outcome, 'details': details}
+    checkpoint_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    checkpoint_file.flush()
+
+# --- Producer: scrape into the bounded queue ---
+def _scrape_into_queue(cocktail_infos, scraped_queue, fetch_workers, extractor, reporter, errors):
+    try:
+        for cocktail_info, details in iter_scrape_concurrently(cocktail_infos, fetch_workers=fetch_workers,
+                                                               extractor=extractor, reporter=reporter):
+            scraped_queue.put((cocktail_info, details)) # Blocks while the importer is behind (backpressure)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        scraped_queue.put(_STREAM_DONE)
+
+# --- Consumer: build payloads and POST them as scraped cocktails arrive ---
+# Payloads are built on this thread (auto-creation updates ingredient_map); the POSTs run on a small
+# pool whose in-flight count is adapted to the server's latency by an AIMDController.
+def stream_import(cocktail_infos, ingredient_map, inference_tables, existing_recipe_names,
+                  checkpoint_path=STREAM_CHECKPOINT_FILE, queue_size=STREAM_QUEUE_SIZE, fetch_workers=DEFAULT_FETCH_WORKERS,
+                  extractor=None, reporter=None, failures=None):
+    counts = {'imported': 0, 'duplicate': 0, 'skipped': 0, 'failed': 0}
+    scraped_queue = queue.Queue(maxsize=queue_size)
+    producer_errors = []
+    producer = threading.Thread(target=_scrape_into_queue, name='scraper',
+                                args=(cocktail_infos, scraped_queue, fetch_workers, extractor, reporter, producer_errors), daemon=True)
+    import_controller = AIMDController(max_limit=importer.MAX_IMPORT_CONCURRENCY)
+    pending_imports = [] # (cocktail_info, details, future)
+
+    start_time = time.monotonic()
+    first_import_at = None
+
+    def record(cocktail_info, outcome, details):
+        counts[outcome] += 1
+        append_checkpoint(checkpoint_file, cocktail_info, outcome, details)
+        if reporter is not None:
+            reporter.finish('cocktails', ok=outcome != 'failed', started=False)
+
+    def collect_finished_imports(wait_for_all=False):
+        nonlocal first_import_at
+        still_pending = []
+        for cocktail_info, details, future in pending_imports:
+            if not wait_for_all and not future.done():
+                still_pending.append((cocktail_info, details, future))
+                continue
+            if future.result():
+                if first_import_at is None:
+                    first_import_at = time.monotonic() - start_time
+                    print(f"  First recipe imported {first_import_at:.1f}s after start.")
+                record(cocktail_info, 'imported', details)
+            else:
+                record(cocktail_info, 'failed', details)
+        pending_imports[:] = still_pending
+
+    producer.start()
+    with open(checkpoint_path, 'a', encoding='utf-8') as checkpoint_file, \
+         ThreadPoolExecutor(max_workers=importer.MAX_IMPORT_CONCURRENCY) as import_pool:
+        while True:
+            try:
+                # While POSTs are in flight, wake up regularly to checkpoint them instead of waiting for
+                # the next scraped page, which can take a while with Gemini extraction
+                item = scraped_queue.get(timeout=STREAM_POLL_INTERVAL if pending_imports else None)
+            except queue.Empty:
+                collect_finished_imports()
+                continue
+            if item is _STREAM_DONE:
+                break
+            cocktail_info, details = item
+            cocktail_name = (details.get('name') or 'Unnamed Recipe').strip()
+            print(f"\nImporting '{cocktail_name}' ({scraped_queue.qsize()} scraped cocktails waiting, {import_controller.describe()})")
+
+            if not cocktail_name or (not details.get('ingredients') and not details.get('preparation')):
+                print(f"  Skipping '{cocktail_name}' - no valid name or no ingredients/preparation found in scraped data.")
+                record(cocktail_info, 'failed' if details.get('notes') else 'skipped', details) # Notes mean scraping went wrong; retry on restart
+            elif cocktail_name.lower() in existing_recipe_names:
+                print(f"  Skipping '{cocktail_name}' - Recipe already exists (duplicate detected).")
+                record(cocktail_info, 'duplicate', details)
+            else:
+                glass_id, category_id = infer_glass_and_category(inference_tables, details)
+                with track(reporter, 'build'):
+                    payload = importer.build_cocktailpi_recipe_payload(details, ingredient_map, glass_id, category_id)
+                if not importer.has_meaningful_steps(payload):
+                    print(f"  Skipping '{cocktail_name}' - generated payload contains no meaningful dispense or instruction steps.")
+                    record(cocktail_info, 'skipped', details)
+                else:
+                    existing_recipe_names.add(cocktail_name.lower())
+                    future = importer.submit_recipe_payload(import_pool, import_controller, payload, reporter, failures)
+                    pending_imports.append((cocktail_info, details, future))
+
+            collect_finished_imports()
+
+        collect_finished_imports(wait_for_all=True)
+
+    producer.join()
+    if producer_errors:
+        print(f"Warning: Scraping stopped early: {producer_errors[0]}. Restart to continue from the checkpoint.")
+    return counts
+
+# --- Main execution flow ---
+def main():
+    parser = argparse.ArgumentParser(description="Scrape cocktails and import them into CocktailPi as they arrive.")
+    parser.add_argument('--limit', type=int, default=None, help="Only process the first N cocktails of the list")
+    parser.add_argument('--workers', type=int, default=DEFAULT_FETCH_WORKERS, help="Scraper I/O threads")
+    parser.add_argument('--queue-size', type=int, default=STREAM_QUEUE_SIZE, help="Scraped cocktails buffered ahead of the importer")
+    parser.add_argument('--checkpoint', default=STREAM_CHECKPOINT_FILE, help="Checkpoint file used to resume an interrupted run")
+    parser.add_argument('--backend', choices=BACKEND_CHOICES, default=DEFAULT_EXTRACTION_BACKEND,
+                        help="tiered = infobox parsing first, Gemini only for pages it can't handle")
+    parser.add_argument('--model-tier', choices=sorted(GEMINI_MODEL_TIERS), default=DEFAULT_MODEL_TIER, help="Gemini model tier")
+    parser.add_argument('--summary', default=STREAM_RUN_SUMMARY_FILE, help="Where to write the machine-readable run summary")
+    parser.add_argument('--failure-queue', default=FAILURE_QUEUE_FILE,
+                        help="Failed POSTs are queued here; retry them with 'python failure_queue.py retry'")
+    args = parser.parse_args()
+
+    extractor = build_extractor(args.backend, args.model_tier, max_concurrent=DEFAULT_GEMINI_CONCURRENCY)
+    if args.backend != 'local':
+        try:
+            get_gemini_model(GEMINI_MODEL_TIERS[args.model_tier]) # Fail before logging in rather than on every scraped page
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            exit()
+
+    try:
+        with open(COCKTAIL_LIST_FILE, 'r', encoding='utf-8') as f:
+            cocktail_list = json.load(f)
+    except FileNotFoundError:
+        print(f"Error: {COCKTAIL_LIST_FILE} not found. Run scrape_cocktails.py first.")
+        exit()
+    if args.limit is not None:
+        cocktail_list = cocktail_list[:args.limit]
+
+    finished = load_checkpoint(args.checkpoint)
+    cocktails_to_stream = [c for c in cocktail_list if (c['name'], c['url']) not in finished]
+    print(f"{len(cocktail_list) - len(cocktails_to_stream)} cocktails already finished according to {args.checkpoint}, "
+          f"{len(cocktails_to_stream)} to go.")
+
+    if not importer.login():
+        exit()
+    ingredient_map, glass_map, category_map = importer.fetch_cocktailpi_data()
+    if not ingredient_map:
+        print("Could not retrieve CocktailPi ingredients. Cannot proceed with recipe import.")
+        exit()
+    existing_recipe_names = importer.fetch_existing_recipe_names()
+    # Resolved once; each cocktail is then placed by volume and ingredient profile as it arrives
+    inference_tables = InferenceTables(glass_map, category_map, importer.choose_default_glass_id(glass_map),
+                                       importer.choose_default_category_id(category_map))
+
+    reporter = ProgressReporter(len(cocktails_to_stream), 'cocktails', label='cocktails')
+    with reporter:
+        counts = stream_import(
+            cocktails_to_stream, ingredient_map, inference_tables, existing_recipe_names,
+            checkpoint_path=args.checkpoint, queue_size=args.queue_size, fetch_workers=args.workers,
+            extractor=extractor, reporter=reporter, failures=FailureQueue(args.failure_queue)
+        )
+
+    print(f"\n--- Stream Import Summary ---")
+    print(f"Recipes successfully imported: {counts['imported']}")
+    print(f"Recipes skipped (missing data or no meaningful steps): {counts['skipped']}")
+    print(f"Recipes skipped (due to being duplicates): {counts['duplicate']}")
+    print(f"Recipes failed (will be retried on the next run): {counts['failed']}")
+
+    reporter.write_summary(args.summary, extra={'outcomes': counts, 'backend': args.backend, 'modelTier': args.model_tier})
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from corpus_store import find_cocktail, iter_corpus_db, load_cocktails, save_cocktails
+
+COCKTAILS = [
+    {'name': 'Negroni', 'url': 'https://en.wikipedia.org/wiki/Negroni', 'description': 'Bitter and sweet.',
+     'ingredients': [{'amount': 1, 'unit': 'oz', 'name': 'gin', 'unit_ml': 29.57},
+                     {'amount': 'None', 'unit': 'None', 'name': 'orange peel', 'unit_ml': None}],
+     'preparation': ['Stir into glass over ice.', 'Garnish and serve.'],
+     'revision_id': 101, 'extraction_backend': 'infobox'},
+    {'name': 'Daiquiri', 'url': 'https://en.wikipedia.org/wiki/Daiquiri', 'description': '',
+     'ingredients': [{'amount': 1.5, 'unit': 'oz', 'name': 'white rum', 'unit_ml': 44.36}],
+     'preparation': ['Shake.'], 'notes': ['Gemini returned empty response.']},
+]
+
+@pytest.mark.parametrize('filename', ['corpus.db', 'corpus.json'])
+def test_round_trip(tmp_path, filename):
+    path = str(tmp_path / filename)
+    save_cocktails(COCKTAILS, path)
+    assert load_cocktails(path) == COCKTAILS
+
+def test_lookups_by_name_and_url(tmp_path):
+    path = str(tmp_path / 'corpus.db')
+    save_cocktails(COCKTAILS, path)
+    assert find_cocktail(path, name='negroni') == COCKTAILS[0]
+    assert find_cocktail(path, url='https://en.wikipedia.org/wiki/Daiquiri') == COCKTAILS[1]
+    assert find_cocktail(path, name='Gimlet') is None
+
+def test_saving_again_replaces_the_contents(tmp_path):
+    path = str(tmp_path / 'corpus.db')
+    save_cocktails(COCKTAILS, path)
+    save_cocktails(COCKTAILS[1:], path)
+    assert [c['name'] for c in iter_corpus_db(path)] == ['Daiquiri']
+
+@pytest.mark.parametrize('read', [load_cocktails, lambda path: list(iter_corpus_db(path)),
+                                  lambda path: find_cocktail(path, name='Negroni')])
+def test_missing_store_raises_and_is_not_created(tmp_path, read):
+    path = str(tmp_path / 'typo.db')
+    with pytest.raises(FileNotFoundError):
+        read(path)
+    assert not os.path.exists(path)
+
+def test_other_sqlite_files_are_rejected(tmp_path):
+    import sqlite3
+    path = str(tmp_path / 'other.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (x)")
+    conn.close()
+    with pytest.raises(ValueError):
+        load_cocktails(path)
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+import Import_Recipes as importer
+from export_bundle import BUNDLE_FORMAT_VERSION, load_recipe_bundle, write_recipe_bundle
+
+def _bundle(*names):
+    recipes = [{'name': name, 'productionSteps': []} for name in names]
+    return {'version': BUNDLE_FORMAT_VERSION, 'generatedAt': '2024-01-01T00:00:00', 'recipeCount': len(recipes),
+            'recipes': recipes, 'skipped': []}
+
+def test_bundle_round_trips(tmp_path):
+    path = str(tmp_path / 'bundle.json')
+    write_recipe_bundle(_bundle('Negroni', 'Daiquiri'), path)
+    assert [recipe['name'] for recipe in load_recipe_bundle(path)['recipes']] == ['Negroni', 'Daiquiri']
+
+def test_load_rejects_other_versions(tmp_path):
+    path = tmp_path / 'bundle.json'
+    path.write_text(json.dumps(dict(_bundle('Negroni'), version=BUNDLE_FORMAT_VERSION + 1)))
+    with pytest.raises(ValueError):
+        load_recipe_bundle(str(path))
+
+def test_import_replays_payloads_and_skips_existing(monkeypatch):
+    posted = []
+    def fake_post(payload, controller=None, reporter=None, failures=None):
+        posted.append(payload['name'])
+        controller.record(0.01)
+        return payload['name'] != 'Daiquiri'
+    monkeypatch.setattr(importer, 'post_recipe_payload', fake_post)
+
+    existing = {'negroni'}
+    counts = importer.import_recipe_bundle(_bundle('Negroni', 'Daiquiri', 'Gimlet'), existing, max_concurrency=2)
+
+    assert sorted(posted) == ['Daiquiri', 'Gimlet']
+    assert counts == {'imported': 1, 'duplicates': 1, 'failed': 1}
+    assert existing == {'negroni', 'daiquiri', 'gimlet'}
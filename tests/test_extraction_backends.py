@@ -0,0 +1,46 @@
+import pytest
+
+from extraction_backends import InfoboxExtractor, parse_ingredient_line
+
+@pytest.mark.parametrize('line, expected', [
+    ('45 ml gin', (45.0, 'ml', 'gin')),
+    ('1½ oz (45 ml) lemon juice', (1.5, 'oz', 'lemon juice')),
+    ('1 ½ oz white rum', (1.5, 'oz', 'white rum')),
+    ('1 1/2 oz bourbon', (1.5, 'oz', 'bourbon')),
+    ('1⁄2 oz gin', (0.5, 'oz', 'gin')), # {{frac|1|2}}, U+2044 fraction slash
+    ('1 1⁄2 oz gin', (1.5, 'oz', 'gin')),
+    ('1 1 ⁄ 2 oz gin', (1.5, 'oz', 'gin')), # The same with the frac spans split by get_text(' ')
+    ('1-2 dashes bitters', (1.5, 'dashes', 'bitters')),
+    ('1–2 dashes Angostura bitters', (1.5, 'dashes', 'angostura bitters')),
+    ('2 fl oz vodka', (2.0, 'oz', 'vodka')),
+    ('3 cl fresh lime juice', (3.0, 'cl', 'lime juice')),
+    ('2 slices of orange', (2.0, 'None', 'orange')),
+    ('Top up with soda water', ('top up with', 'None', 'soda water')),
+    ('A splash of grenadine', ('splash of', 'None', 'grenadine')),
+    ('Simple syrup to taste', ('to taste', 'None', 'simple syrup')),
+])
+def test_parses_infobox_lines(line, expected):
+    ingredient = parse_ingredient_line(line)
+    assert (ingredient['amount'], ingredient['unit'], ingredient['name']) == expected
+
+@pytest.mark.parametrize('line', ['1 oz 2 ml gin', '2 - - 3 oz rum', 'Gin', '', '(optional)'])
+def test_unrecognised_quantities_are_left_to_the_llm(line):
+    assert parse_ingredient_line(line) is None
+
+def test_infobox_extractor_builds_details():
+    page = {
+        'infobox': {'primary alcohol by volume': 'Gin', 'served': 'On the rocks',
+                    'ingredients': ['1 1⁄2 oz gin', '1 oz Campari', '1 oz sweet red vermouth'],
+                    'preparation': 'Stir into glass over ice. Garnish and serve.', 'standard garnish': 'orange peel'},
+        'lead': 'The Negroni is an Italian cocktail.',
+        'text': '',
+    }
+    details = InfoboxExtractor().extract({'name': 'Negroni'}, page)
+    assert [i['name'] for i in details['ingredients']] == ['gin', 'campari', 'sweet red vermouth', 'orange peel']
+    assert details['ingredients'][0]['unit_ml'] == pytest.approx(44.36, abs=0.5)
+    assert details['preparation'] == ['Stir into glass over ice.', 'Garnish and serve.']
+    assert details['description'] == 'The Negroni is an Italian cocktail.'
+
+def test_infobox_extractor_passes_on_unparseable_lines():
+    page = {'infobox': {'ingredients': ['1 oz 2 ml gin'], 'preparation': 'Stir.'}, 'lead': '', 'text': ''}
+    assert InfoboxExtractor().extract({'name': 'Odd'}, page) is None
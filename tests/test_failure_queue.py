@@ -0,0 +1,43 @@
+import pytest
+
+from failure_queue import PERMANENT, TRANSIENT, FailureQueue, classify_note
+
+@pytest.mark.parametrize('note, kind', [
+    ("Page fetch failed: HTTPSConnectionPool(host='en.wikipedia.org', port=443): Read timed out. (read timeout=15)", TRANSIENT),
+    ("Page fetch failed: HTTPSConnectionPool(host='en.wikipedia.org', port=443): Max retries exceeded with url: "
+     "/wiki/Negroni (Caused by NewConnectionError('Failed to establish a new connection: [Errno 111] Connection refused'))",
+     TRANSIENT),
+    ("Page fetch failed: 503 Server Error: Service Unavailable for url: https://en.wikipedia.org/wiki/Negroni", TRANSIENT),
+    ("Page fetch failed: 429 Client Error: Too Many Requests for url: https://en.wikipedia.org/wiki/Negroni", TRANSIENT),
+    ("Page fetch failed: 404 Client Error: Not Found for url: https://en.wikipedia.org/wiki/Page_500", PERMANENT),
+    ("Gemini API call failed: 429 Resource has been exhausted (e.g. check quota).", TRANSIENT),
+    ("Gemini API call failed: 400 API key not valid.", PERMANENT),
+    ("Gemini JSON parse error: Expecting value: line 1 column 1 (char 0)", PERMANENT),
+    ("No extraction backend could handle this page.", PERMANENT),
+])
+def test_classify_note(note, kind):
+    assert classify_note(note) == kind
+
+def test_queue_persists_attempts_and_resolution(tmp_path):
+    path = str(tmp_path / 'queue.jsonl')
+    failures = FailureQueue(path)
+    failures.record('scrape', 'https://en.wikipedia.org/wiki/Negroni', 'timed out', TRANSIENT, item={'name': 'Negroni'})
+    failures.record('scrape', 'https://en.wikipedia.org/wiki/Negroni', 'timed out', TRANSIENT)
+    failures.record('import', 'daiquiri', 'HTTP 400', PERMANENT)
+
+    reloaded = FailureQueue(path)
+    entry = reloaded.entries[('scrape', 'https://en.wikipedia.org/wiki/Negroni')]
+    assert entry['attempts'] == 2 and entry['item'] == {'name': 'Negroni'}
+    assert [e['key'] for e in reloaded.pending()] == ['https://en.wikipedia.org/wiki/Negroni']
+    assert reloaded.due(now=0) == []
+
+    reloaded.resolve('scrape', 'https://en.wikipedia.org/wiki/Negroni')
+    reloaded.compact()
+    assert list(FailureQueue(path).entries) == [('import', 'daiquiri')]
+
+def test_items_go_dead_after_max_attempts(tmp_path):
+    failures = FailureQueue(str(tmp_path / 'queue.jsonl'))
+    for _ in range(3):
+        entry = failures.record('import', 'gimlet', 'HTTP 503', TRANSIENT, max_attempts=3)
+    assert entry['status'] == 'dead'
+    assert failures.pending() == []
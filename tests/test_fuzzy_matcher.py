@@ -0,0 +1,20 @@
+from fuzzy_matcher import FuzzyIndex, similarity
+
+NAMES = ['lime juice', 'orange juice', 'soda water', 'lillet', 'cointreau', 'ginger ale', 'gin']
+
+def test_generic_query_does_not_claim_a_more_specific_name():
+    index = FuzzyIndex(NAMES)
+    assert index.best_match('juice') == (None, 0)
+    assert index.best_match('water') == (None, 0)
+
+def test_extra_query_words_are_forgiven():
+    index = FuzzyIndex(NAMES)
+    assert index.best_match('kina lillet')[0] == 'lillet'
+    assert index.best_match('fresh lime juice')[0] == 'lime juice'
+
+def test_typos_still_match():
+    assert FuzzyIndex(NAMES).best_match('cointreu')[0] == 'cointreau'
+
+def test_similarity_is_asymmetric():
+    assert similarity('soda water', 'water') == 100
+    assert similarity('water', 'soda water') < 85
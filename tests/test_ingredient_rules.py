@@ -0,0 +1,36 @@
+from ingredient_rules import compile_rules, find_rule_problems, load_rules
+
+def _rules(*keywords, match_mode='word_start'):
+    return compile_rules({'version': 1, 'match_mode': match_mode,
+                          'classification_rules': [{'keyword': k, 'target': t} for k, t in keywords]})
+
+def test_keyword_must_end_at_a_word_end():
+    rules = _rules(('gin', 'gin'), ('lime juice', 'lime juice'))
+    assert rules.classify('ginger beer') == []
+    assert rules.classify('dry gin') == [('gin', 'gin')]
+    assert rules.classify('gin, london dry') == [('gin', 'gin')]
+    assert rules.classify('lime juiced') == []
+
+def test_moscow_mule_ingredients_with_the_shipped_rules():
+    rules = load_rules(use_cache=False)
+    assert rules.classify('ginger beer')[0][1] == 'ginger beer'
+    assert all(target != 'gin' for _, target in rules.classify('ginger beer'))
+    assert rules.classify('vodka')[0][1] == 'vodka'
+
+def test_more_specific_rule_wins():
+    rules = _rules(('rum', 'rum'), ('white rum', 'white rum'))
+    assert [target for _, target in rules.classify('white rum')] == ['white rum', 'rum']
+
+def test_substring_mode_flags_keywords_matching_inside_words():
+    rules = _rules(('gin', 'gin'), ('ginger ale', 'ginger ale'), match_mode='substring')
+    assert any("'gin'" in problem and 'ginger ale' in problem for problem in rules.warnings)
+    assert rules.classify('ginger syrup') == [('gin', 'gin')]
+
+def test_whole_word_overlaps_are_not_flagged():
+    assert _rules(('gin', 'gin'), ('dry gin', 'dry gin'), ('ginger ale', 'ginger ale')).warnings == []
+
+def test_shadowed_and_conflicting_rules_are_flagged():
+    rules = [('gin', 'gin', 200), ('dry gin', 'dry gin', 100), ('gin', 'genever', 100)]
+    problems = find_rule_problems(rules, 'word_start')
+    assert "Rule 'dry gin' -> 'dry gin' is shadowed by 'gin' -> 'gin'" in problems
+    assert "Conflicting rule for keyword 'gin': 'gin' and 'genever'" in problems
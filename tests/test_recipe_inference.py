@@ -0,0 +1,35 @@
+from recipe_inference import InferenceTables, infer_glass_and_category
+
+GLASSES = {'shot glass': 1, 'cocktail glass': 2, 'old fashioned glass': 3, 'highball glass': 4, 'wine glass': 9}
+CATEGORIES = {'non-alcoholic': 11, 'shots': 12, 'sours': 13, 'long drinks': 14, 'classics': 19}
+
+def _infer(*ingredients):
+    tables = InferenceTables(GLASSES, CATEGORIES, default_glass_id=9, default_category_id=19)
+    lines = [{'amount': amount, 'unit': unit, 'name': name, 'unit_ml': unit_ml}
+             for amount, unit, name, unit_ml in ingredients]
+    return infer_glass_and_category(tables, {'ingredients': lines})
+
+def test_topped_up_long_drink_is_not_a_shot():
+    # Gin and tonic: 2 oz gin, tonic 'top with' -> 59 ml measured, the rest unknown
+    assert _infer((2, 'oz', 'gin', 59.1), ('top with', 'None', 'tonic water', None),
+                  ('None', 'None', 'lime wedge', None)) == (9, 14)
+
+def test_parts_notation_is_not_a_shot():
+    assert _infer((2, 'parts', 'rum', 2.0), (1, 'part', 'lime juice', 1.0), (1, 'part', 'simple syrup', 1.0)) == (9, 13)
+
+def test_fully_measured_shot():
+    assert _infer((20, 'ml', 'coffee liqueur', 20.0), (20, 'ml', 'irish cream', 20.0)) == (1, 12)
+
+def test_fully_measured_sour_and_long_drink():
+    assert _infer((60, 'ml', 'white rum', 60.0), (30, 'ml', 'lime juice', 30.0), (15, 'ml', 'simple syrup', 15.0)) == (2, 13)
+    assert _infer((50, 'ml', 'vodka', 50.0), (120, 'ml', 'ginger beer', 120.0), (10, 'ml', 'lime juice', 10.0)) == (4, 14)
+
+def test_shirley_temple_is_non_alcoholic():
+    glass_id, category_id = _infer((200, 'ml', 'ginger ale', 200.0), (10, 'ml', 'grenadine', 10.0),
+                                   ('None', 'None', 'maraschino cherry', None))
+    assert (glass_id, category_id) == (4, 11)
+
+def test_keywords_match_whole_words_only():
+    tables = InferenceTables(GLASSES, CATEGORIES, 9, 19)
+    assert tables.flags_for('ginger ale') == tables.flags_for('soda water')
+    assert tables.flags_for('dry gin') != tables.flags_for('ginger ale')
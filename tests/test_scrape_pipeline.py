@@ -0,0 +1,38 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scrape_pipeline import HostFetchLimiter
+
+def _fetch_all(limiter, urls, duration=0.05):
+    lock = threading.Lock()
+    in_flight = {}
+    peak = {}
+    starts = {}
+
+    def fetch(url):
+        host = url.split('/')[2]
+        with limiter.slot(url):
+            with lock:
+                in_flight[host] = in_flight.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), in_flight[host])
+                starts.setdefault(host, []).append(time.monotonic())
+            time.sleep(duration)
+            with lock:
+                in_flight[host] -= 1
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(fetch, urls))
+    return peak, starts
+
+def test_caps_fetches_in_flight_per_host():
+    urls = [f"https://en.wikipedia.org/wiki/Cocktail_{i}" for i in range(12)]
+    urls += [f"https://example.com/recipe/{i}" for i in range(12)]
+    peak, _ = _fetch_all(HostFetchLimiter(per_host=2, min_interval=0), urls)
+    assert peak == {'en.wikipedia.org': 2, 'example.com': 2}
+
+def test_spaces_out_fetch_starts_per_host():
+    urls = [f"https://en.wikipedia.org/wiki/Cocktail_{i}" for i in range(5)]
+    _, starts = _fetch_all(HostFetchLimiter(per_host=5, min_interval=0.05), urls, duration=0)
+    times = sorted(starts['en.wikipedia.org'])
+    assert all(later - earlier >= 0.045 for earlier, later in zip(times, times[1:]))
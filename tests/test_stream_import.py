@@ -0,0 +1,50 @@
+import json
+import os
+import threading
+
+import Import_Recipes as importer
+import stream_import
+from recipe_inference import InferenceTables
+
+COCKTAILS = [{'name': name, 'url': f"https://en.wikipedia.org/wiki/{name}"} for name in ('Negroni', 'Daiquiri')]
+
+def _details(info):
+    return {'name': info['name'], 'url': info['url'], 'description': '',
+            'ingredients': [{'amount': 1, 'unit': 'oz', 'name': 'gin', 'unit_ml': 29.57}], 'preparation': ['Stir.']}
+
+def _read_checkpoint(path):
+    if not os.path.exists(path): # The scraper thread starts before the checkpoint file is opened
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_finished_imports_are_checkpointed_while_the_scraper_is_slow(tmp_path, monkeypatch):
+    checkpoint_path = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint_before_second_page = []
+
+    def slow_scraper(cocktail_infos, **kwargs):
+        yield cocktail_infos[0], _details(cocktail_infos[0])
+        # The next page takes a while (a Gemini call); the first recipe's POST finishes meanwhile
+        for _ in range(40):
+            if _read_checkpoint(checkpoint_path):
+                break
+            threading.Event().wait(0.05)
+        checkpoint_before_second_page.extend(_read_checkpoint(checkpoint_path))
+        yield cocktail_infos[1], _details(cocktail_infos[1])
+
+    def fake_post(payload, controller=None, reporter=None, failures=None):
+        controller.record(0.01)
+        return True
+
+    monkeypatch.setattr(stream_import, 'iter_scrape_concurrently', slow_scraper)
+    monkeypatch.setattr(stream_import, 'STREAM_POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(importer, 'build_cocktailpi_recipe_payload', lambda details, *args, **kwargs: {'name': details['name']})
+    monkeypatch.setattr(importer, 'has_meaningful_steps', lambda payload: True)
+    monkeypatch.setattr(importer, 'post_recipe_payload', fake_post)
+
+    counts = stream_import.stream_import(COCKTAILS, {}, InferenceTables({}, {}, 1, 1), set(), checkpoint_path=checkpoint_path)
+
+    assert [entry['name'] for entry in checkpoint_before_second_page] == ['Negroni']
+    assert counts['imported'] == 2
+    assert [(e['name'], e['outcome']) for e in _read_checkpoint(checkpoint_path)] == [('Negroni', 'imported'), ('Daiquiri', 'imported')]
+    assert stream_import.load_checkpoint(checkpoint_path) == {(c['name'], c['url']) for c in COCKTAILS}
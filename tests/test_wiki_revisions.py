@@ -0,0 +1,81 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import wiki_revisions
+from wiki_revisions import fetch_revisions, plan_incremental_scrape, title_from_url
+
+# What the stub MediaWiki API knows: normalisations, redirects and the pages that exist
+NORMALIZED = {'negroni': 'Negroni'}
+REDIRECTS = {'Gin and Tonic': 'Gin and tonic'}
+PAGES = {'Negroni': 101, 'Gin and tonic': 202, 'Daiquiri': 303}
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        titles = parse_qs(urlsplit(self.path).query)['titles'][0].split('|')
+        self.server.batches.append(titles)
+        if 'Broken batch' in titles:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        normalized = [{'from': t, 'to': NORMALIZED[t]} for t in titles if t in NORMALIZED]
+        titles = [NORMALIZED.get(t, t) for t in titles]
+        redirects = [{'from': t, 'to': REDIRECTS[t]} for t in titles if t in REDIRECTS]
+        pages = []
+        for title in (REDIRECTS.get(t, t) for t in titles):
+            if title in PAGES:
+                pages.append({'title': title, 'revisions': [{'revid': PAGES[title], 'timestamp': '2024-01-01T00:00:00Z'}]})
+            else:
+                pages.append({'title': title, 'missing': True})
+        body = json.dumps({'query': {'normalized': normalized, 'redirects': redirects, 'pages': pages}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def api_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubApiHandler)
+    server.batches = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/w/api.php", server.batches
+    server.shutdown()
+    server.server_close()
+
+def test_follows_normalisation_and_redirects_back_to_requested_titles(api_url):
+    url, _ = api_url
+    revisions = fetch_revisions(['negroni', 'Gin and Tonic', 'Daiquiri'], api_url=url)
+    assert {title: r['revision_id'] for title, r in revisions.items()} == {
+        'negroni': 101, 'Gin and Tonic': 202, 'Daiquiri': 303}
+
+def test_missing_pages_are_left_out(api_url):
+    url, _ = api_url
+    assert fetch_revisions(['Daiquiri', 'No such cocktail'], api_url=url).keys() == {'Daiquiri'}
+
+def test_failed_batch_only_drops_its_own_titles(api_url, monkeypatch):
+    url, batches = api_url
+    monkeypatch.setattr(wiki_revisions, 'MAX_TITLES_PER_QUERY', 2)
+    revisions = fetch_revisions(['Negroni', 'Broken batch', 'Daiquiri', 'Daiquiri', None], api_url=url)
+    assert batches == [['Negroni', 'Broken batch'], ['Daiquiri']]
+    assert revisions.keys() == {'Daiquiri'}
+
+def test_unchanged_pages_are_reused():
+    cocktails = [{'name': 'Negroni', 'url': 'https://en.wikipedia.org/wiki/Negroni'},
+                 {'name': 'Daiquiri', 'url': 'https://en.wikipedia.org/wiki/Daiquiri'}]
+    previous = [dict(cocktails[0], revision_id=101), dict(cocktails[1], revision_id=300)]
+    to_scrape, reused = plan_incremental_scrape(cocktails, previous, {'Negroni': {'revision_id': 101},
+                                                                       'Daiquiri': {'revision_id': 303}})
+    assert list(reused) == [0]
+    assert to_scrape == [(1, cocktails[1])]
+
+def test_title_from_url():
+    assert title_from_url('https://en.wikipedia.org/wiki/20th_century_(cocktail)#Recipe') == '20th century (cocktail)'
+    assert title_from_url('https://example.com/recipes/negroni') is None
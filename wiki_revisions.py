@@ -0,0 +1,86 @@
+import requests
+from urllib.parse import unquote, urlsplit
+
+# --- Configuration ---
+WIKIPEDIA_API_URL = 'https://en.wikipedia.org/w/api.php' # Point at a local stub server to test without Wikipedia
+MAX_TITLES_PER_QUERY = 50 # MediaWiki's limit for anonymous clients
+
+def title_from_url(url):
+    """'https://en.wikipedia.org/wiki/20th_century_(cocktail)#Recipe' -> '20th century (cocktail)'"""
+    path = urlsplit(url).path
+    if '/wiki/' not in path:
+        return None
+    return unquote(path.split('/wiki/', 1)[1]).replace('_', ' ')
+
+def fetch_revisions(titles, headers=None, api_url=WIKIPEDIA_API_URL, timeout=15):
+    """
+    Looks up the latest revision of many pages with one query per MAX_TITLES_PER_QUERY titles.
+    Returns {requested title: {'revision_id': int, 'revision_timestamp': str}}; titles that are missing
+    or whose batch failed are left out, so callers treat them as changed.
+    """
+    unique_titles = list(dict.fromkeys(t for t in titles if t))
+    revisions = {}
+
+    for start in range(0, len(unique_titles), MAX_TITLES_PER_QUERY):
+        batch = unique_titles[start:start + MAX_TITLES_PER_QUERY]
+        params = {
+            'action': 'query',
+            'prop': 'revisions',
+            'rvprop': 'ids|timestamp',
+            'titles': '|'.join(batch),
+            'redirects': 1,
+            'format': 'json',
+            'formatversion': 2
+        }
+        try:
+            response = requests.get(api_url, params=params, headers=headers, timeout=timeout)
+            response.raise_for_status()
+            query = response.json().get('query', {})
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"  Warning: Revision lookup failed for {len(batch)} titles ({e}). They will be re-scraped.")
+            continue
+
+        # Follow the API's title normalization and redirects back to the titles we asked for
+        renamed = {}
+        for entry in query.get('normalized', []) + query.get('redirects', []):
+            renamed[entry['from']] = entry['to']
+
+        latest_by_title = {}
+        for page in query.get('pages', []):
+            if page.get('missing') or not page.get('revisions'):
+                continue
+            revision = page['revisions'][0]
+            latest_by_title[page['title']] = {
+                'revision_id': revision['revid'],
+                'revision_timestamp': revision['timestamp']
+            }
+
+        for title in batch:
+            resolved = title
+            seen = set()
+            while resolved in renamed and resolved not in seen: # Guard against redirect loops
+                seen.add(resolved)
+                resolved = renamed[resolved]
+            if resolved in latest_by_title:
+                revisions[title] = latest_by_title[resolved]
+
+    return revisions
+
+def plan_incremental_scrape(cocktail_list, previous_details, revisions):
+    """
+    Splits cocktail_list into entries that need scraping and previously scraped details that can be reused.
+    A previous result is reused only if it recorded the same revision ID and had no extraction notes (errors).
+    Returns (to_scrape, reused) where reused maps list index -> previous details.
+    """
+    previous_by_key = {(d.get('name'), d.get('url')): d for d in previous_details}
+
+    to_scrape = []
+    reused = {}
+    for index, cocktail_info in enumerate(cocktail_list):
+        previous = previous_by_key.get((cocktail_info['name'], cocktail_info['url']))
+        latest = revisions.get(title_from_url(cocktail_info['url']))
+        if previous and latest and not previous.get('notes') and previous.get('revision_id') == latest['revision_id']:
+            reused[index] = previous
+        else:
+            to_scrape.append((index, cocktail_info))
+    return to_scrape, reused